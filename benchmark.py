@@ -0,0 +1,187 @@
+#! /usr/bin/env python3
+"""
+ Program: Stage level benchmarks for the gamelist pipeline against a synthetic ES-DE library.
+    Name: Andrew Dixon            File: benchmark.py
+    Date: 17 Oct 2026
+   Notes: python benchmark.py --systems 10 --games 2000 --media 6 --output results.json
+
+    Copyright (C) 2025  Andrew Dixon
+
+    This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+    warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with this program.
+    If not, see <https://www.gnu.org/licenses/>.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+from gamelist_tools import ESDE
+from gamelist_tools import EmulationStation
+from gamelist_tools.utils.Ubiquitous import find_lists, get_gamelist_data, iter_game_elements, iter_games
+from gamelist_tools.utils.Ubiquitous import build_media_index, media_stem, gen_xml, write_gamelist, escape_text
+from gamelist_tools.utils.CreateDummyData import generate, MEDIA_CATEGORIES
+
+
+def timed(stage: str, repeat: int, func, setup=None) -> dict:
+  """
+  Run a stage repeat times and return its timings. setup runs untimed before each run and its result is passed
+  to the stage.
+  """
+
+  times = []
+  for _ in range(repeat):
+    arg = setup() if setup else None
+    start = time.perf_counter()
+    func(arg) if setup else func()
+    times.append(time.perf_counter() - start)
+
+  print(f'[+] {stage:<20} min {min(times):.4f}s  mean {sum(times) / len(times):.4f}s')
+  return {'min': min(times), 'mean': sum(times) / len(times), 'runs': times}
+
+
+def run(root: str, output_root: str, repeat: int) -> dict:
+  """
+  Time each stage of the pipeline against the library in root.
+  """
+
+  gamelist_dir = os.path.join(root, 'gamelists')
+  media_dir = os.path.join(root, 'downloaded_media')
+  mapping = ESDE.return_mapping(invert=True)
+  output_mapping = EmulationStation.return_mapping(invert=True)
+  lists = find_lists(gamelist_dir)
+
+  def parse():
+    return ESDE.parse_gamelist_data(root)
+
+  def load_games():
+    return [(gl['system'], list(iter_games(gl['path'], mapping))) for gl in lists]
+
+  def match_media(data):
+    for system, games in data:
+      index = build_media_index(os.path.join(media_dir, system))
+      for game in games:
+        index.get(media_stem(game.path))
+
+  def set_rel_paths(data):
+    for gl in data:
+      gl.set_rel_paths(prepend='images')
+
+  def generate(data):
+    for gl in data:
+      gen_xml(gl, output_mapping)
+
+  def generate_getattr(data):
+    # The per field getattr loop gen_xml used before mappings were compiled, as a baseline for gen_xml.
+    for gl in data:
+      doc = []
+      for game in gl.games:
+        children = []
+        for attr, tag in output_mapping.items():
+          value = getattr(game, attr, None)
+          if value is not None:
+            if isinstance(value, list):
+              value = ', '.join(value)
+            children.append(f'\t\t<{tag}>{escape_text(str(value))}</{tag}>\n')
+        doc.append(f'\t<game>\n{"".join(children)}\t</game>\n' if children else '\t<game/>\n')
+      ''.join(doc)
+
+  def output(args):
+    data, directory = args
+    for gl in data:
+      write_gamelist(gl, output_mapping, os.path.join(directory, gl.system))
+
+  def fresh_output():
+    # A new directory each run, otherwise every run after the first is skipped as unchanged.
+    os.makedirs(output_root, exist_ok=True)
+    return parse(), tempfile.mkdtemp(dir=output_root)
+
+  def written_output():
+    data, directory = fresh_output()
+    output((data, directory))
+    return data, directory
+
+  stages = {}
+  stages['find_lists'] = timed('find_lists', repeat, lambda: find_lists(gamelist_dir))
+  stages['get_gamelist_data'] = timed(
+    'get_gamelist_data', repeat, lambda: [get_gamelist_data(gl['path']) for gl in lists]
+  )
+  stages['iter_game_elements'] = timed(
+    'iter_game_elements', repeat, lambda: [sum(1 for _ in iter_game_elements(gl['path'])) for gl in lists]
+  )
+  stages['game_construction'] = timed(
+    'game_construction', repeat, lambda: [list(iter_games(gl['path'], mapping)) for gl in lists]
+  )
+  stages['build_media_index'] = timed(
+    'build_media_index', repeat,
+    lambda: [build_media_index(os.path.join(media_dir, gl['system'])) for gl in lists]
+  )
+  stages['media_matching'] = timed('media_matching', repeat, match_media, load_games)
+  stages['parse_gamelist_data'] = timed('parse_gamelist_data', repeat, parse)
+  stages['set_rel_paths'] = timed('set_rel_paths', repeat, set_rel_paths, parse)
+  stages['gen_xml_getattr'] = timed('gen_xml_getattr', repeat, generate_getattr, parse)
+  stages['gen_xml'] = timed('gen_xml', repeat, generate, parse)
+  stages['output_gamelist'] = timed('output_gamelist', repeat, output, fresh_output)
+  stages['output_unchanged'] = timed('output_unchanged', repeat, output, written_output)
+
+  return stages
+
+
+def main(
+  systems: int, games: int, media: int, missing: float, repeat: int, root: str = None, output: str = None
+) -> None:
+  """
+  Main
+  """
+
+  with tempfile.TemporaryDirectory() as temp_dir:
+    library = root if root else os.path.join(temp_dir, 'library')
+
+    if not os.path.isdir(os.path.join(library, 'gamelists')):
+      print(f'[+] Building synthetic library: {systems} systems x {games} games x {media} media files...')
+      start = time.perf_counter()
+      generate(library, systems, games, media, missing)
+      print(f'[+] Library built in {time.perf_counter() - start:.2f} seconds\n')
+
+    results = {
+      'parameters': {'systems': systems, 'games': games, 'media': media, 'missing': missing, 'repeat': repeat},
+      'python': sys.version,
+      'platform': platform.platform(),
+      'stages': run(library, os.path.join(temp_dir, 'output'), repeat),
+    }
+
+  if output:
+    with open(output, 'w') as f:
+      json.dump(results, f, indent=2)
+    print(f'\n[+] Results written to: {output}')
+  else:
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Benchmark each stage of the gamelist pipeline.')
+
+  parser.add_argument('--systems', '-s', type=int, default=5, help='Number of systems to generate.')
+  parser.add_argument('--games', '-g', type=int, default=1000, help='Number of games per system.')
+  parser.add_argument(
+    '--media', '-m', type=int, default=6, help=f'Media files per game (max {len(MEDIA_CATEGORIES)}).'
+  )
+  parser.add_argument('--missing', type=float, default=0.1, help='Ratio of media files left out.')
+  parser.add_argument('--repeat', '-r', type=int, default=3, help='Number of times to run each stage.')
+  parser.add_argument(
+    '--root', default=None, help='Reuse (or build and keep) a synthetic library at this path.'
+  )
+  parser.add_argument('--output', '-o', default=None, help='Write JSON results to this file.')
+
+  args = parser.parse_args()
+
+  main(args.systems, args.games, args.media, args.missing, args.repeat, args.root, args.output)
@@ -23,4 +23,13 @@ from .utils import ESDE as ESDE
 from .utils import Batocera as Batocera
 from .utils import EmulationStation as EmulationStation
 from .utils import Ubiquitous as Ubiquitous
+from .utils import Cache as Cache
+from .utils import Catalog as Catalog
+from .utils import Hashing as Hashing
+from .utils import MediaSync as MediaSync
+from .utils import Export as Export
+from .utils import Watch as Watch
+from .utils import Search as Search
+from .utils import Serve as Serve
 from .models import Gamelist as Gamelist
+from .models import GamelistTable as GamelistTable
@@ -20,11 +20,99 @@
 """
 
 import os
+import re
+import operator
 import xml.dom.minidom as XML
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional
-from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+from dataclasses import dataclass, field, fields
+
+# Splits a name into runs of digits and everything else for natural ordering.
+NATURAL_SPLIT = re.compile(r'(\d+)')
+
+
+def natural_key(value: str) -> tuple:
+  """
+  # Natural sort key
+
+  Return a casefolded key for a string where runs of digits compare as numbers, so "Game 2" sorts before
+  "Game 10". Numbers always land on the odd positions of the key, so keys can be compared with each other.
+
+  ```python
+  natural_key(value: str) -> tuple
+  ```
+
+  """
+
+  parts = NATURAL_SPLIT.split(value.casefold())
+  return tuple(int(part) if i % 2 else part for i, part in enumerate(parts))
+
+
+# Game attributes that hold media paths, these are rewritten by set_rel_paths.
+MEDIA_PATHS = [
+  'miximage',
+  'marquee',
+  'boxfront',
+  'boxback',
+  'box3d',
+  'cartridge',
+  'titleshot',
+  'thumbnail',
+  'manual',
+  'video',
+  'gamemap',
+  'bezel',
+  'fanart',
+  'magazine',
+]
+
+
+def rel_path(value: str, depth: int = 2, prepend: str = None) -> str:
+  """
+  # Relative path
+
+  Return the "./" relative path for a media path, keeping the last ```depth``` parts of the path and prepending a
+  directory if passed. This is what ```Game.set_rel_paths``` sets for each media path.
+
+  ```python
+  rel_path(value: str, depth: int = 2, prepend: str = None) -> str
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | value           | str       | Path to shorten.                                                |
+  | depth           | int       | How far up the path to traverse before stopping.                |
+  | prepend         | str       | Directory name to prepend to the path.                          |
+
+  """
+
+  path_object = Path(value)
+
+  # Determine what the base portion of the path before any prepending.
+  if depth > len(path_object.parts):
+    value = str(path_object)
+  else:
+    parts = list(path_object.parts)[-depth:]
+    value = os.sep.join(parts)
+
+  if prepend:
+    prepend = prepend.strip()
+
+    if not prepend.endswith(os.sep):
+      prepend += os.sep
+
+    if not prepend.startswith(f'.{os.sep}'):
+      prepend = f'.{os.sep}' + prepend
+
+    value = prepend + value
+
+  elif not value.startswith(f'.{os.sep}'):
+    value = f'.{os.sep}{value}'
+
+  return value
 
 
 @dataclass(slots=True)
@@ -160,6 +248,34 @@ class Game:
     return f'<class Game({self.name}) {id(self)}>'
 
 
+  def sort_key(self, natural: bool = False) -> tuple:
+    """
+    # Sort key
+
+      ```python
+        Game.sort_key(natural: bool = False) -> tuple
+      ```
+
+    Return the key games are ordered by: sortname (or name when not set) then release date. Pass it as ```key=```
+    to ```sorted``` so it is built once per game instead of on every comparison. With ```natural``` the name is
+    casefolded and numbers in it are compared by value.
+
+    Unlike ```__lt__```, which treats games with the same name as equal when either has no release date (keeping
+    them in file order), the key puts undated games before dated ones of the same name. That gives the key a
+    consistent order where ```__lt__``` has none.
+
+    ## Properties
+
+    | Property        | Type      | Description |
+    |:----------------|:----------|:----------------------------------------------------------------|
+    | natural         | bool      | Casefold the name and compare digit runs as numbers.            |
+
+    """
+
+    name = (self.sortname if self.sortname else self.name) or ''
+    return (natural_key(name) if natural else name, self.releasedate or '')
+
+
   def __eq__(self, other: 'Game') -> bool:
     """Return equality based on game name, release date, then path."""
     if not isinstance(other, Game):
@@ -174,6 +290,16 @@ class Game:
     )
 
 
+  def __hash__(self) -> int:
+    """Return hash based on the game's identity (path), consistent with equality."""
+    return hash(self.identity())
+
+
+  def identity(self) -> str:
+    """Return the normalized path of the game within its system, used to tell games apart."""
+    return os.path.normpath(self.path) if self.path else ''
+
+
   def __lt__(self, other: 'Game') -> bool:
     """Return if the current game is less than another by name and release date."""
     if not isinstance(other, Game):
@@ -273,22 +399,7 @@ class Game:
     """
 
     # Update paths for images to relative paths inside the system directory.
-    paths = [
-      'miximage',
-      'marquee',
-      'boxfront',
-      'boxback',
-      'box3d',
-      'cartridge',
-      'titleshot',
-      'thumbnail',
-      'manual',
-      'video',
-      'gamemap',
-      'bezel',
-      'fanart',
-      'magazine',
-    ]
+    paths = MEDIA_PATHS
 
     # Remove the excluded entries.
     if exclude:
@@ -298,31 +409,139 @@ class Game:
     for tag in paths:
       value = getattr(self, tag)
       if value:
+        setattr(self, tag, rel_path(value, depth, prepend))
 
-        path_object = Path(value)
 
-        # Determine what the base portion of the path before any prepending.
-        if depth > len(path_object.parts):
-          value = str(path_object)
-        else:
-          parts = list(path_object.parts)[-depth:]
-          value = os.sep.join(parts)
+# Attribute names on the Game object, in declaration order.
+GAME_FIELDS = tuple(f.name for f in fields(Game))
 
-        if prepend:
-          prepend = prepend.strip()
+# Boolean metadata flags, these are read from XML as "true"/"false" strings.
+FLAG_FIELDS = (
+  'favorite',
+  'completed',
+  'hidden',
+  'broken',
+  'kidgame',
+  'nogamecount',
+  'hidemetadata',
+  'nomultiscrape',
+)
 
-          if not prepend.endswith(os.sep):
-            prepend += os.sep
+# Comparisons a filter can use, written as attribute__op (year__ge=1990). Plain attribute=value is 'eq'.
+FILTER_OPS = {
+  'eq': operator.eq,
+  'ne': operator.ne,
+  'lt': operator.lt,
+  'le': operator.le,
+  'gt': operator.gt,
+  'ge': operator.ge,
+}
 
-          if not prepend.startswith(f'.{os.sep}'):
-            prepend = f'.{os.sep}' + prepend
+# Matches the numbers in a players value like "1-4".
+PLAYERS_PATTERN = re.compile(r'\d+')
 
-          value = prepend + value
 
-        elif not value.startswith(f'.{os.sep}'):
-          value = f'.{os.sep}{value}'
+def flag_value(value) -> bool:
+  """Return a boolean flag as a bool whether it was set as a bool or read from XML as a string."""
+  if isinstance(value, str):
+    return value.strip().casefold() == 'true'
 
-        setattr(self, tag, value)
+  return bool(value)
+
+
+def release_year(game: 'Game') -> Iterable[int]:
+  """Return the year a game was released in, nothing if the release date isn't set or isn't a date."""
+  # 1970 is the placeholder both the Game default and ES-DE use for a date that was never set.
+  year = (game.releasedate or '')[:4]
+  return (int(year),) if year.isdigit() and year != '1970' else ()
+
+
+def max_players(game: 'Game') -> Iterable[int]:
+  """Return the most players a game supports ("1-4" is 4), nothing if it isn't known."""
+  numbers = PLAYERS_PATTERN.findall(str(game.players or ''))
+  return (max(int(number) for number in numbers),) if numbers else ()
+
+
+def text_key(value: Optional[str]) -> Iterable[str]:
+  """Return a casefolded text value as an index key, nothing if it isn't set."""
+  value = value.strip().casefold() if value else ''
+  return (value,) if value else ()
+
+
+# Filters answered from an index, name -> function returning the index keys for a game. genre matches any one of
+# a game's genres, year and players are derived from releasedate and players.
+INDEXES: Dict[str, Callable[['Game'], Iterable]] = {
+  **{flag: (lambda game, flag=flag: (flag_value(getattr(game, flag)),)) for flag in FLAG_FIELDS},
+  'genre': lambda game: {genre.strip().casefold() for genre in game.genres or () if genre.strip()},
+  'developer': lambda game: text_key(game.developer),
+  'publisher': lambda game: text_key(game.publisher),
+  'year': release_year,
+  'players': max_players,
+}
+
+
+def index_value(name: str, value):
+  """Normalize a filter value the same way the keys of an index are."""
+  if name in FLAG_FIELDS:
+    return flag_value(value)
+
+  if name in ('year', 'players'):
+    return int(value)
+
+  return str(value).strip().casefold()
+
+
+def scan_value(current, value):
+  """Return a game's value ready to compare against a filter value. Numeric fields are read from XML as strings, so
+  they are compared as numbers when the filter value is a number, None if the game's value isn't one."""
+  if current is None or not isinstance(value, (int, float)) or isinstance(value, bool):
+    return current
+
+  try:
+    return float(current)
+  except (TypeError, ValueError):
+    return None
+
+
+def parse_filter(criterion: str) -> tuple[str, str]:
+  """Split an attribute__op filter into (attribute, op), raising ValueError for an unknown op."""
+  name, _, op = criterion.partition('__')
+  op = op or 'eq'
+
+  if op not in FILTER_OPS:
+    raise ValueError(f'Unknown filter operation: {criterion}')
+
+  return name, op
+
+
+def filter_gamelists(gamelists: List['Gamelist'], **criteria) -> List['Gamelist']:
+  """
+  # Filter gamelists
+
+  Filter every gamelist in a library, see ```Gamelist.filter```. Returns a Gamelist per system holding the
+  matching games (the same Game objects, not copies), leaving out systems with no matches. The results can be
+  written out like any other Gamelist for curated lists.
+
+  ```python
+  filter_gamelists(gamelists, kidgame=True, hidden=False, genre='Shooter', players__ge=2) -> List[Gamelist]
+  ```
+
+  """
+
+  filtered = []
+
+  for gamelist in gamelists:
+    games = gamelist.filter(**criteria)
+    if games:
+      filtered.append(Gamelist(
+        path=gamelist.path,
+        system=gamelist.system,
+        xml_decl=gamelist.xml_decl,
+        altemulator=gamelist.altemulator,
+        games=games,
+      ))
+
+  return filtered
 
 
 @dataclass(slots=True)
@@ -351,6 +570,10 @@ class Gamelist:
   xml_decl: Optional[str] = field(default='<?xml version="1.0"?>')
   altemulator: Optional[str] = field(default=None)
   games: List[Game] = field(default_factory=list)
+  _index: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+  _indexed: int = field(default=0, init=False, repr=False, compare=False)
+  _lookups: Dict[str, Dict] = field(default_factory=dict, init=False, repr=False, compare=False)
+  _lookups_games: List[Game] = field(default_factory=list, init=False, repr=False, compare=False)
 
 
   def __str__(self) -> str:
@@ -368,14 +591,208 @@ class Gamelist:
     return f'<class Gamelist({self.system}) {id(self)}>'
 
 
-  def sort(self) -> None:
-    """Sort games in place"""
-    self.games = sorted(self.games)
+  def __hash__(self) -> int:
+    """Return hash based on system, consistent with equality."""
+    return hash(self.system)
+
+
+  def __contains__(self, item: Game | str) -> bool:
+    """Return if a game (or a game path) is in the Gamelist."""
+    return self.get(item.identity() if isinstance(item, Game) else item) is not None
+
+
+  def append(self, game: Game) -> None:
+    """Add a game to the Gamelist and the path index."""
+    self.reindex(stale_only=True)
+    self._index.setdefault(game.identity(), len(self.games))
+    self.games.append(game)
+    self._indexed += 1
+
+
+  def extend(self, games: List[Game]) -> None:
+    """Add several games to the Gamelist and the path index."""
+    for game in games:
+      self.append(game)
+
+
+  def remove(self, game: Game) -> None:
+    """Remove a game from the Gamelist and the path index."""
+    self.games.remove(game)
+
+    # The games after it have moved up a position.
+    self.reindex()
+
+
+  def get(self, path: str) -> Optional[Game]:
+    """Return the game for a path within the system (normalized, so './Game.zip' and 'Game.zip' match)."""
+    identity = os.path.normpath(path) if path else ''
+
+    self.reindex(stale_only=True)
+    position = self._index.get(identity)
+
+    # A game replaced or moved in the list without going through the Gamelist leaves the position pointing at
+    # another game, rebuild the index rather than return it.
+    if position is not None and (position >= len(self.games) or self.games[position].identity() != identity):
+      self.reindex()
+      position = self._index.get(identity)
+
+    return self.games[position] if position is not None else None
+
 
+  def reindex(self, stale_only: bool = False) -> None:
+    """
+    # Rebuild the path index
+
+      ```python
+        Gamelist.reindex(stale_only: bool = False):
+      ```
+
+    Rebuild the path -> position index from the games list. The index is kept up to date by ```append```,
+    ```extend``` and ```remove```, and is rebuilt automatically when the number of games changes behind its back
+    or ```get``` finds a different game at a position. A path that only appeared through a game replaced in the
+    list, or a path changed in place, isn't found until this is called. The indexes ```filter``` uses are thrown
+    away as well, call this after changing any indexed attribute of a game in place.
+
+    ## Properties
+
+    | Property        | Type      | Description |
+    |:----------------|:----------|:----------------------------------------------------------------|
+    | stale_only      | bool      | Only rebuild if the games list changed size since indexing.     |
+
+    """
 
-  def sorted(self) -> List[Game]:
-    """Return a sorted list of games in this Gamelist."""
-    return sorted(self.games)
+    if stale_only and self._indexed == len(self.games):
+      return
+
+    if not stale_only:
+      self._lookups = {}
+
+    # Keep the first game for a path, matching what a scan of the list would find.
+    self._index = {}
+    for position, game in enumerate(self.games):
+      self._index.setdefault(game.identity(), position)
+    self._indexed = len(self.games)
+
+
+  def lookup(self, name: str) -> Dict:
+    """
+    # Filter index
+
+      ```python
+        Gamelist.lookup(name: str) -> dict
+      ```
+
+    Return the index for a name in ```INDEXES```: key -> positions of the games with that key, in list order.
+    Indexes are built the first time they are asked for and rebuilt whenever the games list no longer holds the
+    same Game objects in the same order, however it was changed. Changes made to a game's attributes in place
+    aren't seen here, call ```reindex()``` after making them.
+
+    ## Properties
+
+    | Property        | Type      | Description |
+    |:----------------|:----------|:----------------------------------------------------------------|
+    | name            | str       | Index name from ```INDEXES```.                                  |
+
+    """
+
+    # The indexes hold positions, so they only hold for the list they were built from. Comparing the games by
+    # identity catches games added, removed, replaced or reordered without going through the Gamelist.
+    games = self.games
+    built = self._lookups_games
+    if len(built) != len(games) or not all(map(operator.is_, built, games)):
+      self._lookups = {}
+      self._lookups_games = list(games)
+
+    index = self._lookups.get(name)
+    if index is None:
+      index = {}
+      keys = INDEXES[name]
+      for position, game in enumerate(self.games):
+        for key in keys(game):
+          index.setdefault(key, []).append(position)
+      self._lookups[name] = index
+
+    return index
+
+
+  def filter(self, **criteria) -> List[Game]:
+    """
+    # Filter games
+
+      ```python
+        Gamelist.filter(kidgame=True, hidden=False, genre='Shooter', players__ge=2) -> List[Game]
+      ```
+
+    Return the games matching every criterion, in list order. Criteria are attribute=value, or attribute__op=value
+    with op one of eq, ne, lt, le, gt or ge. Boolean flags, ```genre``` (any one of the genres), ```developer```,
+    ```publisher```, ```year``` and ```players``` (the most players supported) are answered from indexes, text
+    is compared case insensitively. Any other Game attribute is compared directly against each game, as a number
+    when the filter value is one (games whose value isn't a number don't match). See ```lookup``` for when the
+    indexes are rebuilt.
+
+    ## Properties
+
+    | Property        | Type      | Description |
+    |:----------------|:----------|:----------------------------------------------------------------|
+    | criteria        | Any       | attribute=value or attribute__op=value filters.                 |
+
+    """
+
+    positions = None
+    scans = []
+
+    for criterion, value in criteria.items():
+      name, op = parse_filter(criterion)
+
+      if name not in INDEXES:
+        if name not in GAME_FIELDS:
+          raise ValueError(f'Unknown filter field: {name}')
+        scans.append((name, FILTER_OPS[op], value))
+        continue
+
+      index = self.lookup(name)
+      value = index_value(name, value)
+
+      if op == 'eq':
+        matched = set(index.get(value, ()))
+      else:
+        compare = FILTER_OPS[op]
+        matched = {position for key, found in index.items() if compare(key, value) for position in found}
+
+      positions = matched if positions is None else positions & matched
+
+      # Nothing left to narrow down.
+      if not positions:
+        return []
+
+    games = self.games if positions is None else [self.games[position] for position in sorted(positions)]
+
+    for name, compare, value in scans:
+      matched = []
+      for game in games:
+        current = scan_value(getattr(game, name), value)
+        if current is None:
+          continue
+
+        try:
+          if compare(current, value):
+            matched.append(game)
+        except TypeError:
+          raise ValueError(f'Cannot compare {name} values with {value!r}') from None
+
+      games = matched
+
+    return games
+
+
+  def sort(self, natural: bool = False) -> None:
+    """Sort games in place, optionally in casefolded natural order."""
+    self.games.sort(key=lambda game: game.sort_key(natural))
+
+
+  def sorted(self, natural: bool = False) -> List[Game]:
+    """Return a sorted list of games in this Gamelist, optionally in casefolded natural order."""
+    return sorted(self.games, key=lambda game: game.sort_key(natural))
 
 
   def __eq__(self, other: 'Gamelist') -> bool:
@@ -479,3 +896,53 @@ class RawGamelist:
   def __repr__(self) -> str:
     """Return unique identifier for Gamelist"""
     return f'<class RawGamelist({self.system}) {id(self)}>'
+
+
+@dataclass(slots=True)
+class MediaIndex:
+  """
+  # MediaIndex
+
+    ```python
+      MediaIndex(path: str, media: Dict[str, Dict[str, str]])
+    ```
+
+  Index of the scraped media for a single system. Built from one walk of the system media directory
+  so games can be matched to their media without searching the directory tree for every game.
+
+  ## Properties
+
+  | Property        | Type                       | Description |
+  |:----------------|:---------------------------|:--------------------------------------------------------------------|
+  | path            | str                        | The path to the system media directory that was indexed.            |
+  | media           | Dict[str, Dict[str, str]]  | Normalized file stem -> {media category (directory) -> file path}.  |
+
+  """
+
+  path: str
+  media: Dict[str, Dict[str, str]] = field(default_factory=dict)
+
+
+  def __str__(self) -> str:
+    """Return string representation of the MediaIndex."""
+    return f'{self.path} - ({len(self.media)} names)'
+
+
+  def __len__(self) -> int:
+    """Return the number of distinct file names in the MediaIndex."""
+    return len(self.media)
+
+
+  def __repr__(self) -> str:
+    """Return unique identifier for MediaIndex."""
+    return f'<class MediaIndex({self.path}) {id(self)}>'
+
+
+  def add(self, stem: str, category: str, path: str) -> None:
+    """Add a media file to the index. The first file found for a name and category is kept."""
+    self.media.setdefault(stem, {}).setdefault(category, path)
+
+
+  def get(self, stem: str) -> Dict[str, str]:
+    """Return the media category -> path dictionary for a file stem, empty if nothing was found."""
+    return self.media.get(stem, {})
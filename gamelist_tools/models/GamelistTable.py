@@ -0,0 +1,201 @@
+#! /usr/bin/env python3
+"""
+  Program: Column oriented representation of a gamelist for holding very large libraries in memory.
+    Name: Andrew Dixon            File: GamelistTable.py
+    Date: 17 Oct 2026
+    Notes:
+
+    Copyright (C) 2025  Andrew Dixon
+
+    This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+    warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with this program.
+    If not, see <https://www.gnu.org/licenses/>.
+
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+from array import array
+from itertools import repeat
+from typing import Dict, Iterator, List, Optional
+from dataclasses import dataclass, field
+from gamelist_tools.models.Gamelist import Gamelist, Game, GAME_FIELDS
+
+# Attributes with few distinct values that are stored once and referenced by code for every game.
+DICTIONARY_FIELDS = frozenset([
+  'rating',
+  'releasedate',
+  'developer',
+  'publisher',
+  'players',
+  'genres',
+  'family',
+  'region',
+  'language',
+  'playcount',
+  'lastplayed',
+  'core',
+  'emulator',
+  'altemulator',
+  'arcadesystemname',
+  'controller',
+  'favorite',
+  'completed',
+  'hidden',
+  'broken',
+  'kidgame',
+  'nogamecount',
+  'hidemetadata',
+  'nomultiscrape',
+])
+
+
+@dataclass(slots=True)
+class GamelistTable:
+  """
+  # GamelistTable
+
+    ```python
+      GamelistTable.from_gamelist(gamelist: Gamelist) -> GamelistTable
+    ```
+
+  Array backed alternative to a Gamelist that stores each Game attribute as a column instead of holding a Game
+  object per entry. Low cardinality attributes (developer, publisher, genres, region, players, flags...) are
+  dictionary encoded as an array of codes into a list of distinct values, attributes that are never set take no
+  space at all. Convert back with ```to_gamelist``` or hand the table straight to ```write_xml```/```gen_xml```.
+
+  ## Properties
+
+  | Property        | Type                | Description |
+  |:----------------|:--------------------|:--------------------------------------------------------------------------------------|
+  | path            | str                 | The path to the gamelist file.                                                        |
+  | system          | str                 | Best guess as to the system based on the enclosing directory name.                    |
+  | xml_decl        | Optional[str]       | The XML declaration at the top of the gamelist file.                                  |
+  | altemulator     | Optional[str]       | For forks that utilize the gamelist.xml to store what emulator to launch games with.  |
+  | length          | int                 | Number of games in the table.                                                         |
+  | columns         | Dict[str, list]     | Attribute -> column. Dictionary encoded columns are ```array('I')``` codes.           |
+  | dictionaries    | Dict[str, list]     | Attribute -> distinct values for dictionary encoded columns.                          |
+
+  """
+
+  path: str
+  system: str
+  xml_decl: Optional[str] = field(default='<?xml version="1.0"?>')
+  altemulator: Optional[str] = field(default=None)
+  length: int = 0
+  columns: Dict[str, list] = field(default_factory=dict)
+  dictionaries: Dict[str, list] = field(default_factory=dict)
+
+
+  def __str__(self) -> str:
+    """Return string representation of the GamelistTable."""
+    return f'{self.system} - ({self.length} games)'
+
+
+  def __len__(self) -> int:
+    """Return the number of games in the GamelistTable."""
+    return self.length
+
+
+  def __repr__(self) -> str:
+    """Return unique identifier for GamelistTable."""
+    return f'<class GamelistTable({self.system}) {id(self)}>'
+
+
+  @classmethod
+  def from_gamelist(cls, gamelist: Gamelist) -> 'GamelistTable':
+    """
+    # Build a GamelistTable from a Gamelist
+
+      ```python
+        GamelistTable.from_gamelist(gamelist: Gamelist) -> GamelistTable
+      ```
+
+    ## Properties
+
+    | Property        | Type      | Description |
+    |:----------------|:----------|:----------------------------------------------------------------|
+    | gamelist        | Gamelist  | Gamelist to convert. The Gamelist is not modified.              |
+
+    """
+
+    table = cls(
+      path=gamelist.path,
+      system=gamelist.system,
+      xml_decl=gamelist.xml_decl,
+      altemulator=gamelist.altemulator,
+      length=len(gamelist.games),
+    )
+
+    for attr in GAME_FIELDS:
+      values = [getattr(game, attr) for game in gamelist.games]
+
+      # Columns that are never set don't need to be stored.
+      if all(value is None for value in values):
+        continue
+
+      if attr in DICTIONARY_FIELDS:
+        # Lists can't be dictionary keys, so they are stored as tuples and turned back into lists on the way out.
+        if attr == 'genres':
+          values = [tuple(value) if value is not None else None for value in values]
+
+        codes = {}
+        table.columns[attr] = array('I', (codes.setdefault(value, len(codes)) for value in values))
+        table.dictionaries[attr] = list(codes)
+      else:
+        table.columns[attr] = values
+
+    return table
+
+
+  def column(self, attr: str) -> Iterator:
+    """Return an iterator over the values of one attribute for every game in order."""
+    column = self.columns.get(attr)
+
+    if column is None:
+      return repeat(None, self.length)
+
+    if attr in self.dictionaries:
+      values = self.dictionaries[attr]
+
+      # Hand out a new list per game so changing one game's genres doesn't change the others.
+      if attr == 'genres':
+        return (list(values[code]) if values[code] is not None else None for code in column)
+
+      return map(values.__getitem__, column)
+
+    return iter(column)
+
+
+  def iter_rows(self, attrs: List[str]) -> Iterator[tuple]:
+    """Return an iterator of value tuples for the requested attributes, one tuple per game."""
+    return zip(*(self.column(attr) for attr in attrs)) if attrs else iter([()] * self.length)
+
+
+  def to_gamelist(self) -> Gamelist:
+    """
+    # Convert to a Gamelist
+
+      ```python
+        GamelistTable.to_gamelist() -> Gamelist
+      ```
+
+    Build a Gamelist with a Game object for every row in the table.
+
+    """
+
+    gamelist = Gamelist(
+      path=self.path,
+      system=self.system,
+      xml_decl=self.xml_decl,
+      altemulator=self.altemulator,
+    )
+
+    for row in self.iter_rows(GAME_FIELDS):
+      gamelist.append(Game(**dict(zip(GAME_FIELDS, row))))
+
+    return gamelist
@@ -20,19 +20,23 @@
 """
 
 import os
+from functools import cache
 # import re
 # import xml.dom.minidom as XML
-from gamelist_tools.models.Gamelist import Gamelist, Game
-from gamelist_tools.utils.Ubiquitous import find_lists, find_files, enclosing_directory, get_text
-from gamelist_tools.utils.Ubiquitous import get_gamelist_data #, parse_value
+from gamelist_tools.models.Gamelist import Gamelist
+from gamelist_tools.utils.Ubiquitous import find_lists, build_media_index, media_stem, iter_games
+from gamelist_tools.utils.Ubiquitous import get_gamelist_info #, parse_value
 
 
+@cache
 def return_mapping(invert: bool = False) -> dict:
   """
     # Return Property mapping dictionary
 
     Map Gamelist object property to XML tag for ES-DE.
 
+    The dictionary is built once per invert and shared between callers, so it must not be modified.
+
     ```python
     return_mapping(invert: bool = False) -> dict
     ```
@@ -169,8 +173,8 @@ def get_system_gamelist(path: str, media_directory: str) -> Gamelist:
     'videos': lambda: setattr(game, 'video', item),
   }
 
-  # Get the raw gamelist data and pre-parse some information from the file.
-  raw_sys = get_gamelist_data(path)
+  # Get the gamelist header information, the games are streamed from the file below.
+  raw_sys = get_gamelist_info(path)
 
   # Initilize gamelist for system
   sys = Gamelist(path=raw_sys.path, system=raw_sys.system, xml_decl=raw_sys.xml_decl)
@@ -178,44 +182,21 @@ def get_system_gamelist(path: str, media_directory: str) -> Gamelist:
   # Prep the games list for games in the game system object
   sys.games = []
 
-  # Map all the fields from the XML to the field in the Game object
-  for raw_game in raw_sys.gamelist.getElementsByTagName('game'):
-    game = Game(
-      name=get_text(raw_game, 'name'),
-      path=get_text(raw_game, 'path'),
-      sortname=get_text(raw_game, 'sortname'),
-      collectionSortName=get_text(raw_game, 'collectionsortname'),
-      description=get_text(raw_game, 'desc'),
-      rating=get_text(raw_game, 'rating'),
-      releasedate=get_text(raw_game, 'releasedate'),
-      developer=get_text(raw_game, 'developer'),
-      publisher=get_text(raw_game, 'publisher'),
-      genres=str(get_text(raw_game, 'genre')).split(','),
-      players=get_text(raw_game, 'players'),
-      favorite=get_text(raw_game, 'favorite'),
-      completed=get_text(raw_game, 'completed'),
-      kidgame=get_text(raw_game, 'kidgame'),
-      hidden=get_text(raw_game, 'hidden'),
-      broken=get_text(raw_game, 'broken'),
-      nogamecount=get_text(raw_game, 'nogamecount'),
-      nomultiscrape=get_text(raw_game, 'nomultiscrape'),
-      hidemetadata=get_text(raw_game, 'hidemetadata'),
-      playcount=get_text(raw_game, 'playcount'),
-      controller=get_text(raw_game, 'controller'),
-      altemulator=get_text(raw_game, 'altemulator'),
-      lastplayed=get_text(raw_game, 'lastplayed'),
-    )
+  # Index the system's media once so each game is a dictionary lookup instead of a directory search.
+  media_index = build_media_index(os.path.join(media_directory, sys.system))
+
+  # Stream the games from the file one element at a time.
+  for game in iter_games(raw_sys.path, return_mapping(invert=True)):
 
     # TODO: Set media file path to be relative gamelist.xml path.
-    # Get file name to look in media directory for specific system for scraped media.
-    filename = os.path.splitext(os.path.basename(game.path))[0]
-    media = find_files(filename, os.path.join(media_directory, sys.system))
+    # Get file name to look up in the media index for specific system for scraped media.
+    media = media_index.get(media_stem(game.path))
 
     # Populate full media paths for images, etc.
-    for item in media:
-      set_media_item.get(enclosing_directory(item), lambda: None)()
+    for category, item in media.items():
+      set_media_item.get(category, lambda: None)()
 
     # Add the game to the list
-    sys.games.append(game)
+    sys.append(game)
 
   return sys
@@ -0,0 +1,178 @@
+#! /usr/bin/env python3
+"""
+ Program: Persistent cache of parsed gamelists to skip reparsing unchanged systems.
+    Name: Andrew Dixon            File: Cache.py
+    Date: 17 Oct 2026
+   Notes: The cache is a pickle file, only point it at files this tool wrote.
+
+    Copyright (C) 2025  Andrew Dixon
+
+    This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+    warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with this program.
+    If not, see <https://www.gnu.org/licenses/>.
+
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+import os
+import pickle
+from gamelist_tools.models.Gamelist import Gamelist
+
+# Bump when the cached objects change shape so old caches are thrown away instead of loaded.
+CACHE_VERSION = 5
+
+
+def media_fingerprint(path: str) -> tuple:
+  """
+  # Media directory fingerprint
+
+  Return the modification times of every directory in a media tree. Adding, removing or renaming a media file
+  changes the mtime of the directory holding it, which is all the media matching depends on, so the files
+  themselves are not stat'd. A missing directory has an empty fingerprint.
+
+  ```python
+  media_fingerprint(path: str) -> tuple
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------|
+  | path            | str       | The path to the system's media directory.   |
+
+  """
+
+  fingerprint = []
+  pending = [path]
+
+  while pending:
+    directory = pending.pop()
+
+    try:
+      fingerprint.append((os.path.relpath(directory, path), os.stat(directory).st_mtime_ns))
+      with os.scandir(directory) as entries:
+        pending.extend(entry.path for entry in entries if entry.is_dir())
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+      continue
+
+  return tuple(sorted(fingerprint))
+
+
+def file_state(path: str) -> tuple:
+  """Return (size, mtime_ns) for a gamelist file, (None, None) if it doesn't exist on disk."""
+  try:
+    stat = os.stat(path)
+  except OSError:
+    return (None, None)
+
+  return (stat.st_size, stat.st_mtime_ns)
+
+
+def gamelist_key(path: str, media_directory: str) -> tuple:
+  """
+  # Gamelist cache key
+
+  Return the key a parsed gamelist is cached under: the gamelist file's size and mtime plus the fingerprint of
+  the system's media directory.
+
+  ```python
+  gamelist_key(path: str, media_directory: str) -> tuple
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------|
+  | path            | str       | The path to the gamelist file.              |
+  | media_directory | str       | The path to the system's media directory.   |
+
+  """
+
+  stat = os.stat(path)
+  return (stat.st_size, stat.st_mtime_ns, media_fingerprint(media_directory))
+
+
+def load_cache(path: str) -> dict:
+  """
+  # Load gamelist cache
+
+  Load the cache file and return a dictionary of gamelist path -> (key, Gamelist). A missing, unreadable or
+  out of date cache file returns an empty dictionary.
+
+  ```python
+  load_cache(path: str) -> dict
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------|
+  | path            | str       | The path to the cache file.                 |
+
+  """
+
+  try:
+    with open(path, 'rb') as f:
+      version, entries = pickle.load(f)
+  except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError):
+    return {}
+
+  return entries if version == CACHE_VERSION else {}
+
+
+def save_cache(path: str, entries: dict) -> None:
+  """
+  # Save gamelist cache
+
+  Write the cache dictionary to disk. The file is written next to the cache and moved into place so an
+  interrupted run never leaves a partial cache behind.
+
+  ```python
+  save_cache(path: str, entries: dict) -> None
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:-----------------------------------------------------------|
+  | path            | str       | The path to the cache file.                                |
+  | entries         | dict      | Gamelist path -> (key, Gamelist) dictionary to be stored.  |
+
+  """
+
+  os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+  temp_path = f'{path}.tmp'
+  with open(temp_path, 'wb') as f:
+    pickle.dump((CACHE_VERSION, entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+  os.replace(temp_path, path)
+
+
+def get_cached(entries: dict, path: str, key: tuple) -> Gamelist:
+  """
+  # Get cached gamelist
+
+  Return the cached Gamelist for a gamelist path if it was stored under the same key, otherwise None.
+
+  ```python
+  get_cached(entries: dict, path: str, key: tuple) -> Gamelist
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------------------|
+  | entries         | dict      | Gamelist path -> (key, Gamelist) dictionary.            |
+  | path            | str       | The path to the gamelist file.                          |
+  | key             | tuple     | Current key for the gamelist from ```gamelist_key```.   |
+
+  """
+
+  cached = entries.get(path)
+  return cached[1] if cached and cached[0] == key else None
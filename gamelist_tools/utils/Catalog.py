@@ -0,0 +1,256 @@
+#! /usr/bin/env python3
+"""
+ Program: SQLite catalog of a whole library for reporting without reparsing gamelists.
+    Name: Andrew Dixon            File: Catalog.py
+    Date: 17 Oct 2026
+   Notes:
+
+    Copyright (C) 2025  Andrew Dixon
+
+    This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+    warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with this program.
+    If not, see <https://www.gnu.org/licenses/>.
+
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+import os
+import sqlite3
+from dataclasses import fields
+from gamelist_tools.models.Gamelist import Gamelist, Game, GAME_FIELDS
+from gamelist_tools.utils.Cache import file_state
+
+# Attributes that default to a bool, SQLite hands these back as 0/1 so they are converted on the way out.
+BOOL_FIELDS = frozenset(f.name for f in fields(Game) if isinstance(f.default, bool))
+
+# Columns that get an index for fast lookups.
+INDEXED_FIELDS = ('system', 'name', 'path', 'developer', 'genres', 'md5', 'crc32')
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS gamelists (
+  path TEXT PRIMARY KEY,
+  system TEXT NOT NULL,
+  xml_decl TEXT,
+  altemulator TEXT,
+  size INTEGER,
+  mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS games (
+  id INTEGER PRIMARY KEY,
+  gamelist TEXT NOT NULL REFERENCES gamelists(path) ON DELETE CASCADE,
+  system TEXT NOT NULL,
+  position INTEGER NOT NULL,
+  {', '.join(GAME_FIELDS)}
+);
+CREATE INDEX IF NOT EXISTS games_gamelist ON games (gamelist);
+{''.join(f'CREATE INDEX IF NOT EXISTS games_{name} ON games ({name});' for name in INDEXED_FIELDS)}
+"""
+
+
+def open_catalog(path: str) -> sqlite3.Connection:
+  """
+  # Open catalog
+
+  Open (creating if needed) the SQLite catalog at path and make sure the tables and indexes exist.
+
+  ```python
+  open_catalog(path: str) -> sqlite3.Connection
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------------------|
+  | path            | str       | The path to the catalog database (or ```:memory:```).   |
+
+  """
+
+  if path != ':memory:':
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+  conn = sqlite3.connect(path)
+  conn.execute('PRAGMA foreign_keys = ON')
+  conn.execute('PRAGMA journal_mode = WAL')
+  conn.executescript(SCHEMA)
+
+  return conn
+
+
+def store_gamelists(conn: sqlite3.Connection, gamelists: list[Gamelist], force: bool = False) -> int:
+  """
+  # Store gamelists in catalog
+
+  Upsert Gamelist objects into the catalog. A gamelist whose file has the same size and mtime as when it was last
+  stored is skipped, otherwise its games are replaced. Returns the number of gamelists written.
+
+  ```python
+  store_gamelists(conn: sqlite3.Connection, gamelists: list[Gamelist], force: bool = False) -> int
+  ```
+
+  ## Properties
+
+  | Property        | Type            | Description |
+  |:----------------|:----------------|:--------------------------------------------------------|
+  | conn            | Connection      | Catalog connection from ```open_catalog```.             |
+  | gamelists       | list[Gamelist]  | Gamelists to store.                                     |
+  | force           | bool            | Rewrite every gamelist even if its file is unchanged.   |
+
+  """
+
+  insert = (
+    f'INSERT INTO games (gamelist, system, position, {", ".join(GAME_FIELDS)}) '
+    f'VALUES (?, ?, ?, {", ".join("?" * len(GAME_FIELDS))})'
+  )
+  written = 0
+
+  with conn:
+    for gamelist in gamelists:
+      size, mtime_ns = file_state(gamelist.path)
+      stored = conn.execute(
+        'SELECT size, mtime_ns FROM gamelists WHERE path = ?', (gamelist.path,)
+      ).fetchone()
+
+      if not force and mtime_ns is not None and stored == (size, mtime_ns):
+        continue
+
+      conn.execute('DELETE FROM games WHERE gamelist = ?', (gamelist.path,))
+      conn.execute(
+        'INSERT OR REPLACE INTO gamelists (path, system, xml_decl, altemulator, size, mtime_ns) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        (gamelist.path, gamelist.system, gamelist.xml_decl, gamelist.altemulator, size, mtime_ns),
+      )
+      conn.executemany(
+        insert,
+        (
+          (gamelist.path, gamelist.system, position, *to_row(game))
+          for position, game in enumerate(gamelist.games)
+        ),
+      )
+      written += 1
+
+  return written
+
+
+def to_row(game: Game) -> tuple:
+  """Return the column values for a Game. Genres are stored comma separated, the way they are read from XML."""
+  return tuple(
+    ','.join(value) if isinstance(value, list) else value
+    for value in (getattr(game, attr) for attr in GAME_FIELDS)
+  )
+
+
+def from_row(row: tuple) -> Game:
+  """Build a Game from the column values stored by ```to_row```."""
+  values = dict(zip(GAME_FIELDS, row))
+
+  if values['genres'] is not None:
+    values['genres'] = values['genres'].split(',')
+
+  for attr in BOOL_FIELDS:
+    if isinstance(values[attr], int):
+      values[attr] = bool(values[attr])
+
+  return Game(**values)
+
+
+def query(
+  conn: sqlite3.Connection,
+  where: str = None,
+  params: tuple = (),
+  order_by: str = 'system, position',
+  limit: int = None,
+  **filters,
+) -> list[Game]:
+  """
+  # Query catalog
+
+  Return Game objects matching the filters. Keyword filters are equality checks on a Game attribute or
+  ```system``` (None matches missing values), ```where``` adds a raw SQL condition with ```params```.
+
+  ```python
+  query(conn, favorite='true', video=None)
+  query(conn, where='developer LIKE ?', params=('%Capcom%',))
+  ```
+
+  ## Properties
+
+  | Property        | Type            | Description |
+  |:----------------|:----------------|:--------------------------------------------------------|
+  | conn            | Connection      | Catalog connection from ```open_catalog```.             |
+  | where           | str             | Extra SQL condition.                                    |
+  | params          | tuple           | Parameters for the ```where``` condition.               |
+  | order_by        | str             | SQL ORDER BY clause.                                    |
+  | limit           | int             | Maximum number of games to return.                      |
+  | filters         | Any             | attribute=value equality filters.                       |
+
+  """
+
+  conditions = []
+  values = []
+
+  for attr, value in filters.items():
+    if attr not in GAME_FIELDS and attr != 'system':
+      raise ValueError(f'Unknown catalog field: {attr}')
+
+    if value is None:
+      conditions.append(f'{attr} IS NULL')
+    else:
+      conditions.append(f'{attr} = ?')
+      values.append(','.join(value) if isinstance(value, list) else value)
+
+  if where:
+    conditions.append(f'({where})')
+    values.extend(params)
+
+  sql = f'SELECT {", ".join(GAME_FIELDS)} FROM games'
+  if conditions:
+    sql += f' WHERE {" AND ".join(conditions)}'
+  if order_by:
+    sql += f' ORDER BY {order_by}'
+  if limit is not None:
+    sql += ' LIMIT ?'
+    values.append(limit)
+
+  return [from_row(row) for row in conn.execute(sql, values)]
+
+
+def load_gamelists(conn: sqlite3.Connection, systems: list[str] = None) -> list[Gamelist]:
+  """
+  # Load gamelists from catalog
+
+  Rebuild Gamelist objects (in stored game order) from the catalog, optionally only for some systems.
+
+  ```python
+  load_gamelists(conn: sqlite3.Connection, systems: list[str] = None) -> list[Gamelist]
+  ```
+
+  ## Properties
+
+  | Property        | Type            | Description |
+  |:----------------|:----------------|:--------------------------------------------------------|
+  | conn            | Connection      | Catalog connection from ```open_catalog```.             |
+  | systems         | list[str]       | Only load these systems.                                |
+
+  """
+
+  sql = 'SELECT path, system, xml_decl, altemulator FROM gamelists'
+  params = ()
+  if systems:
+    sql += f' WHERE system IN ({", ".join("?" * len(systems))})'
+    params = tuple(systems)
+
+  gamelists = []
+  for path, system, xml_decl, altemulator in conn.execute(sql + ' ORDER BY system', params).fetchall():
+    gamelist = Gamelist(path=path, system=system, xml_decl=xml_decl, altemulator=altemulator)
+    rows = conn.execute(
+      f'SELECT {", ".join(GAME_FIELDS)} FROM games WHERE gamelist = ? ORDER BY position', (path,)
+    )
+    gamelist.extend(from_row(row) for row in rows)
+    gamelists.append(gamelist)
+
+  return gamelists
@@ -4,6 +4,7 @@
     Name: Andrew Dixon            File: CreateDummyData.py
     Date: 5 Aug 2025
    Notes: Duplicates XML files so settings and metadata can be parsed and processed.
+          Can also generate a synthetic ES-DE library at any scale with --generate.
 
     Copyright (C) 2025  Andrew Dixon
 
@@ -20,8 +21,43 @@
 """
 
 import os
+import random
 import argparse
 import shutil
+from xml.sax.saxutils import escape
+from concurrent.futures import ThreadPoolExecutor
+
+# Media directories ES-DE creates, in the order they are filled for each game.
+MEDIA_CATEGORIES = [
+  'covers',
+  'screenshots',
+  'miximages',
+  'marquees',
+  'titlescreens',
+  'videos',
+  '3dboxes',
+  'backcovers',
+  'fanart',
+  'manuals',
+  'physicalmedia',
+]
+
+# System folder names used for generated systems, numbered once they run out.
+SYSTEMS = [
+  'arcade', 'atari2600', 'dreamcast', 'gb', 'gba', 'gbc', 'gc', 'genesis', 'mame', 'mastersystem', 'n64', 'nds',
+  'neogeo', 'nes', 'pcengine', 'ps2', 'psp', 'psx', 'psx-japan', 'saturn', 'sega32x', 'segacd', 'snes', 'wii',
+]
+
+# Pieces used to build game names that look like real sets.
+TITLE_WORDS = [
+  'Super', 'Mega', 'Dragon', 'Quest', 'Fighter', 'Street', 'Legend', 'Star', 'Racing', 'Soccer', 'Knight', 'Ninja',
+  'Space', 'Castle', 'Turbo', 'Final', 'Metal', 'Shadow', 'World', 'Tennis', 'Puzzle', 'Adventure', 'Wars', 'Zone',
+]
+ARTICLES = ['The', 'A']
+REGIONS = ['(USA)', '(Europe)', '(Japan)', '(USA, Europe)', '(World)', '(Japan, USA)']
+TAGS = ['(Rev 1)', '(Rev A)', '(Beta)', '(Proto)', '[!]', '[b]', '[h]', '[T+Eng]', '(En,Fr,De)']
+GENRES = ['Action', 'Platform', 'Shooter', 'Sports', 'Racing', 'Puzzle', 'Role Playing Game', 'Fighting']
+DEVELOPERS = ['Capcom', 'Konami', 'Namco', 'Sega', 'Nintendo', 'Taito', 'SNK', 'Irem', 'Hudson Soft', 'unknown']
 
 
 def main(source_dir, dest_dir) -> None:
@@ -53,23 +89,186 @@ def main(source_dir, dest_dir) -> None:
         open(dest_file, 'wb').close()
 
 
+def game_names(rng: random.Random, count: int, discs: float) -> list[tuple[str, str]]:
+  """
+  Return (name, file stem) pairs for count entries. Roughly discs of the games are multi-disc sets, each disc
+  is its own entry the way ES-DE lists them.
+  """
+
+  entries = []
+  used = set()
+  number = 0
+
+  while len(entries) < count:
+    number += 1
+    words = rng.sample(TITLE_WORDS, rng.randint(1, 3))
+    if rng.random() < 0.1:
+      words.insert(0, rng.choice(ARTICLES))
+    if rng.random() < 0.2:
+      words.append(str(rng.randint(2, 4)))
+
+    title = ' '.join(words)
+    stem = f'{title} {rng.choice(REGIONS)}'
+    if rng.random() < 0.3:
+      stem += f' {rng.choice(TAGS)}'
+
+    # Keep file names unique within the system.
+    if stem in used:
+      stem += f' (Alt {number})'
+    used.add(stem)
+
+    if rng.random() < discs:
+      for disc in range(1, rng.randint(2, 4) + 1):
+        entries.append((f'{title} (Disc {disc})', f'{stem} (Disc {disc})'))
+    else:
+      entries.append((title, stem))
+
+  return entries[:count]
+
+
+def touch_files(paths: list[str]) -> None:
+  """
+  Create empty files.
+  """
+
+  for path in paths:
+    os.close(os.open(path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o644))
+
+
+def generate_system(
+  dest_dir: str, system: str, games: int, media: int, missing: float, discs: float, seed: int, executor=None
+) -> int:
+  """
+  Generate the gamelist.xml and downloaded_media tree for one system. Returns the number of media files created.
+  """
+
+  rng = random.Random(seed)
+  gamelist_dir = os.path.join(dest_dir, 'gamelists', system)
+  media_dirs = [os.path.join(dest_dir, 'downloaded_media', system, c) for c in MEDIA_CATEGORIES[:media]]
+
+  os.makedirs(gamelist_dir, exist_ok=True)
+  for directory in media_dirs:
+    os.makedirs(directory, exist_ok=True)
+
+  files = []
+  with open(os.path.join(gamelist_dir, 'gamelist.xml'), 'w') as f:
+    f.write('<?xml version="1.0"?>\n<gameList>\n')
+
+    for name, stem in game_names(rng, games, discs):
+      extension = '.chd' if '(Disc ' in stem else '.zip'
+      f.write(
+        '\t<game>\n'
+        f'\t\t<path>./{escape(stem)}{extension}</path>\n'
+        f'\t\t<name>{escape(name)}</name>\n'
+        f'\t\t<desc>{escape(name)} is a synthetic game. {"Lorem ipsum dolor sit amet. " * rng.randint(1, 12)}</desc>\n'
+        f'\t\t<rating>{rng.randint(0, 10) / 10}</rating>\n'
+        f'\t\t<releasedate>{rng.randint(1978, 2015)}0101T000000</releasedate>\n'
+        f'\t\t<developer>{escape(rng.choice(DEVELOPERS))}</developer>\n'
+        f'\t\t<publisher>{escape(rng.choice(DEVELOPERS))}</publisher>\n'
+        f'\t\t<genre>{escape(rng.choice(GENRES))}</genre>\n'
+        f'\t\t<players>{rng.choice(["1", "1-2", "1-4"])}</players>\n'
+        '\t</game>\n'
+      )
+
+      files.extend(
+        os.path.join(directory, f'{stem}{".mp4" if directory.endswith("videos") else ".png"}')
+        for directory in media_dirs
+        if rng.random() >= missing
+      )
+
+    f.write('</gameList>\n')
+
+  # Create the media files in batches across the pool, the time is all spent in open/close syscalls.
+  batches = [files[i:i + 1000] for i in range(0, len(files), 1000)]
+  if executor:
+    list(executor.map(touch_files, batches))
+  else:
+    for batch in batches:
+      touch_files(batch)
+
+  return len(files)
+
+
+def generate(
+  dest_dir: str,
+  systems: int,
+  games: int,
+  media: int = len(MEDIA_CATEGORIES),
+  missing: float = 0.1,
+  discs: float = 0.05,
+  seed: int = 0,
+  workers: int = 8,
+) -> int:
+  """
+  Generate a synthetic ES-DE user directory (settings, gamelists and downloaded_media) with 0-byte media files.
+  Returns the number of media files created.
+  """
+
+  dest_dir = os.path.abspath(dest_dir)
+  os.makedirs(os.path.join(dest_dir, 'settings'), exist_ok=True)
+  with open(os.path.join(dest_dir, 'settings', 'es_settings.xml'), 'w') as f:
+    f.write('<?xml version="1.0"?>\n<string name="MediaDirectory" value="" />\n')
+
+  names = [
+    SYSTEMS[i] if i < len(SYSTEMS) else f'{SYSTEMS[i % len(SYSTEMS)]}{i // len(SYSTEMS)}'
+    for i in range(systems)
+  ]
+
+  # Systems are generated one after the other with their files created in parallel, so the pool is never
+  # waiting on a thread that is itself waiting on the pool.
+  with ThreadPoolExecutor(max_workers=workers) as executor:
+    return sum(
+      generate_system(dest_dir, system, games, media, missing, discs, seed + i, executor)
+      for i, system in enumerate(names)
+    )
+
+
 if __name__ == '__main__':
   # Call example is python CreateDummyData.py /path/to/source /path/to/destination
+  # Or python CreateDummyData.py --generate /path/to/destination --systems 100 --games 50000
   parser = argparse.ArgumentParser(
     description='Create dummy file structure for testing. Copy XML data files for parsing.'
   )
 
   parser.add_argument(
     'source',
+    nargs='?',
     help='Source directory to walk.'
     )
 
   parser.add_argument(
     'destination',
+    nargs='?',
     help='Destination directory for structure and files.'
     )
 
+  parser.add_argument(
+    '--generate',
+    metavar='DESTINATION',
+    help='Generate a synthetic ES-DE library at the destination instead of copying a source.'
+    )
+
+  parser.add_argument('--systems', type=int, default=10, help='Number of systems to generate.')
+  parser.add_argument('--games', type=int, default=1000, help='Number of games per system.')
+  parser.add_argument(
+    '--media', type=int, default=len(MEDIA_CATEGORIES), help='Number of media directories per system.'
+    )
+  parser.add_argument('--missing', type=float, default=0.1, help='Ratio of media files left out.')
+  parser.add_argument('--discs', type=float, default=0.05, help='Ratio of games that are multi-disc sets.')
+  parser.add_argument('--seed', type=int, default=0, help='Random seed so fixtures can be rebuilt.')
+  parser.add_argument('--workers', type=int, default=8, help='Threads used to create files.')
+
   args = parser.parse_args()
 
-  main(args.source, args.destination)
-  print(f'Dummy structure duplicated at: {args.destination}')
+  if args.generate:
+    count = generate(
+      args.generate, args.systems, args.games, args.media, args.missing, args.discs, args.seed, args.workers
+    )
+    print(f'Generated {args.systems} systems with {count} media files at: {args.generate}')
+
+  elif args.source and args.destination:
+    main(args.source, args.destination)
+    print(f'Dummy structure duplicated at: {args.destination}')
+
+  else:
+    parser.error('source and destination are required unless --generate is used.')
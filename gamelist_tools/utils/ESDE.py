@@ -21,19 +21,25 @@
 
 import os
 import re
+from functools import cache
 import xml.dom.minidom as XML
-# from concurrent.futures import ThreadPoolExecutor, as_completed
-from gamelist_tools.models.Gamelist import Gamelist, Game
-from gamelist_tools.utils.Ubiquitous import find_lists, find_files, enclosing_directory, get_text
-from gamelist_tools.utils.Ubiquitous import get_gamelist_data, parse_value
+from concurrent.futures import ProcessPoolExecutor
+from gamelist_tools.models.Gamelist import Gamelist
+from gamelist_tools.utils.Cache import load_cache, save_cache, gamelist_key, get_cached
+from gamelist_tools.utils.Hashing import hash_roms
+from gamelist_tools.utils.Ubiquitous import find_lists, build_media_index, media_stem, iter_games
+from gamelist_tools.utils.Ubiquitous import get_gamelist_info, parse_value
 
 
+@cache
 def return_mapping(invert: bool = False) -> dict:
   """
     # Return Property mapping dictionary
 
     Map Gamelist object property to XML tag for ES-DE.
 
+    The dictionary is built once per invert and shared between callers, so it must not be modified.
+
     ```python
     return_mapping(invert: bool = False) -> dict
     ```
@@ -82,7 +88,9 @@ def return_mapping(invert: bool = False) -> dict:
   return ELEMENT_MAPPING if not invert else {value: key for key, value in ELEMENT_MAPPING.items()}
 
 
-def parse_gamelist_data(esde_path: str) -> list[Gamelist]:
+def parse_gamelist_data(
+  esde_path: str, workers: int = None, cache: str = None, hashes: bool = False, hash_cache: str = None
+) -> list[Gamelist]:
   """
   # Process all gamelist files for ES-DE
 
@@ -92,55 +100,83 @@ def parse_gamelist_data(esde_path: str) -> list[Gamelist]:
   directory, so no direct path is taken to point this at a specific directory.
 
   ```python
-  parse_gamelist_data(esde_path: str) -> list[Gamelist]
+  parse_gamelist_data(esde_path, workers=None, cache=None, hashes=False, hash_cache=None) -> list[Gamelist]
   ```
 
+  When ```workers``` is set each system is parsed in a separate process. Systems are returned in the same order
+  either way, and in parallel mode a system that fails to parse is reported and left out of the results.
+
+  When ```cache``` is set, parsed systems are stored in that file and only systems whose gamelist file or media
+  directories changed since the last run are parsed again.
+
+  When ```hashes``` is set the ROM files under the configured ROMDirectory are hashed to populate ```md5``` and
+  ```crc32```, with results kept in ```hash_cache``` so unchanged ROMs are not read again.
+
   ## Properties
 
   | Property        | Type      | Description |
-  |:----------------|:----------|:-------------------------------------------|
-  | path            | str       | The path to the ES-DE user directory.      |
+  |:----------------|:----------|:------------------------------------------------------------|
+  | path            | str       | The path to the ES-DE user directory.                       |
+  | workers         | int       | Number of worker processes to parse systems with (opt-in).  |
+  | cache           | str       | Path to the import cache file (opt-in).                     |
+  | hashes          | bool      | Hash ROM files to populate md5 and crc32 (opt-in).          |
+  | hash_cache      | str       | Path to the ROM hash cache file.                            |
 
   """
 
   settings = get_settings(esde_path)
-
-  media_directory = (
-    settings['MediaDirectory']
-    if settings['MediaDirectory']
-    else os.path.join(esde_path, 'downloaded_media')
-  )
+  media_directory = get_media_directory(esde_path, settings)
 
   gamelist_directory = os.path.join(esde_path, 'gamelists')
 
-  imported_data = []
   # Find the gamelists to import information from
   game_lists = find_lists(gamelist_directory)
 
-  # Use ThreadPoolExecutor to parse gamelists in parallel
-  # with ThreadPoolExecutor() as executor:
-  #   futures = {
-  #     executor.submit(
-  #       get_system_gamelist,
-  #       game_list['path'],
-  #       media_directory
-  #     ): game_list
-
-  #     for game_list in game_lists
-  #   }
-
-  #   for future in as_completed(futures):
-  #     try:
-  #       system = future.result()
-  #       imported_data.append(system)
-  #     except Exception as e:
-  #       print(f'An error occurred while processing a gamelist: {e}')
+  # Reuse the systems that haven't changed since the cache was written.
+  cached_data = load_cache(cache) if cache else {}
+  keys = {}
+  imported = {}
+  if cache:
+    for game_list in game_lists:
+      keys[game_list['path']] = gamelist_key(
+        game_list['path'], os.path.join(media_directory, game_list['system'])
+      )
+      hit = get_cached(cached_data, game_list['path'], keys[game_list['path']])
+      if hit is not None:
+        imported[game_list['path']] = hit
+
+  pending = [game_list for game_list in game_lists if game_list['path'] not in imported]
+
+  # Parse the systems in worker processes, the parsing is CPU bound so threads would be held up by the GIL.
+  if workers:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+      futures = [
+        (game_list, executor.submit(get_system_gamelist, game_list['path'], media_directory))
+        for game_list in pending
+      ]
+
+      for game_list, future in futures:
+        try:
+          imported[game_list['path']] = future.result()
+        except Exception as e:
+          print(f'An error occurred while processing the {game_list["system"]} gamelist: {e}')
 
   # Build a gamelist for each system
-  for game_list in game_lists:
-    sys = get_system_gamelist(game_list['path'], media_directory)
+  else:
+    for game_list in pending:
+      imported[game_list['path']] = get_system_gamelist(game_list['path'], media_directory)
+
+  # Store the current state before anything has a chance to modify the gamelists. A run served entirely from the
+  # cache has nothing new to store, so the file is only rewritten when a system was parsed or has gone away.
+  if cache and (pending or cached_data.keys() != imported.keys()):
+    save_cache(cache, {path: (keys[path], gamelist) for path, gamelist in imported.items()})
 
-    imported_data.append(sys)
+  # Return in discovery order so the results are the same however they were produced.
+  imported_data = [imported[game_list['path']] for game_list in game_lists if game_list['path'] in imported]
+
+  # Hashes are kept out of the import cache, the hash cache tracks the ROM files themselves.
+  if hashes:
+    hash_roms(imported_data, get_rom_directory(esde_path, settings), workers or 4, hash_cache)
 
   return imported_data
 
@@ -190,6 +226,60 @@ def get_settings(path: str) -> dict:
   return settings
 
 
+def get_media_directory(esde_path: str, settings: dict = None) -> str:
+  """
+  # Get the ES-DE media directory
+
+  Return the configured downloaded_media directory, or the default one inside the ES-DE user directory.
+
+  ```python
+  get_media_directory(esde_path: str, settings: dict = None) -> str
+  ```
+
+  ## Properties
+
+  | Property        | Type     | Description |
+  |:----------------|:---------|:-----------------------------------------------------------|
+  | esde_path       | str      | The path to the ES-DE user directory.                      |
+  | settings        | dict     | Settings from ```get_settings```, read if not passed.      |
+
+  """
+
+  if settings is None:
+    settings = get_settings(esde_path)
+
+  return (
+    settings['MediaDirectory']
+    if settings.get('MediaDirectory')
+    else os.path.join(esde_path, 'downloaded_media')
+  )
+
+
+def get_rom_directory(esde_path: str, settings: dict = None) -> str:
+  """
+  # Get the ES-DE ROM directory
+
+  Return the configured ROMDirectory, or the default ```~/ROMs```, with the user directory expanded.
+
+  ```python
+  get_rom_directory(esde_path: str, settings: dict = None) -> str
+  ```
+
+  ## Properties
+
+  | Property        | Type     | Description |
+  |:----------------|:---------|:-----------------------------------------------------------|
+  | esde_path       | str      | The path to the ES-DE user directory.                      |
+  | settings        | dict     | Settings from ```get_settings```, read if not passed.      |
+
+  """
+
+  if settings is None:
+    settings = get_settings(esde_path)
+
+  return os.path.expanduser(settings.get('ROMDirectory') or os.path.join('~', 'ROMs'))
+
+
 def get_system_gamelist(path: str, media_directory: str) -> Gamelist:
   """
   # Build a Gamelist object containing Game objects parsed from a given gamelist.xml file.
@@ -226,8 +316,8 @@ def get_system_gamelist(path: str, media_directory: str) -> Gamelist:
     'videos': lambda: setattr(game, 'video', item),
   }
 
-  # Get the raw gamelist data and pre-parse some information from the file.
-  raw_sys = get_gamelist_data(path)
+  # Get the gamelist header information, the games are streamed from the file below.
+  raw_sys = get_gamelist_info(path)
 
   # Initilize gamelist for system
   sys = Gamelist(
@@ -239,44 +329,21 @@ def get_system_gamelist(path: str, media_directory: str) -> Gamelist:
   # Prep the games list for games in the game system object
   sys.games = []
 
-  # Map all the fields from the XML to the field in the Game object
-  for raw_game in raw_sys.gamelist.getElementsByTagName('game'):
-    game = Game(
-      name=get_text(raw_game, 'name'),
-      path=get_text(raw_game, 'path'),
-      sortname=get_text(raw_game, 'sortname'),
-      collectionSortName=get_text(raw_game, 'collectionsortname'),
-      description=get_text(raw_game, 'desc'),
-      rating=get_text(raw_game, 'rating'),
-      releasedate=get_text(raw_game, 'releasedate'),
-      developer=get_text(raw_game, 'developer'),
-      publisher=get_text(raw_game, 'publisher'),
-      genres=str(get_text(raw_game, 'genre')).split(','),
-      players=get_text(raw_game, 'players'),
-      favorite=get_text(raw_game, 'favorite'),
-      completed=get_text(raw_game, 'completed'),
-      kidgame=get_text(raw_game, 'kidgame'),
-      hidden=get_text(raw_game, 'hidden'),
-      broken=get_text(raw_game, 'broken'),
-      nogamecount=get_text(raw_game, 'nogamecount'),
-      nomultiscrape=get_text(raw_game, 'nomultiscrape'),
-      hidemetadata=get_text(raw_game, 'hidemetadata'),
-      playcount=get_text(raw_game, 'playcount'),
-      controller=get_text(raw_game, 'controller'),
-      altemulator=get_text(raw_game, 'altemulator'),
-      lastplayed=get_text(raw_game, 'lastplayed'),
-    )
+  # Index the system's media once so each game is a dictionary lookup instead of a directory search.
+  media_index = build_media_index(os.path.join(media_directory, sys.system))
+
+  # Stream the games from the file one element at a time.
+  for game in iter_games(raw_sys.path, return_mapping(invert=True)):
 
     # TODO: Set media file path to be relative gamelist.xml path.
-    # Get file name to look in media directory for specific system for scraped media.
-    filename = os.path.splitext(os.path.basename(game.path))[0]
-    media = find_files(filename, os.path.join(media_directory, sys.system))
+    # Get file name to look up in the media index for specific system for scraped media.
+    media = media_index.get(media_stem(game.path))
 
     # Populate full media paths for images, etc.
-    for item in media:
-      set_media_item.get(enclosing_directory(item), lambda: None)()
+    for category, item in media.items():
+      set_media_item.get(category, lambda: None)()
 
     # Add the game to the list
-    sys.games.append(game)
+    sys.append(game)
 
   return sys
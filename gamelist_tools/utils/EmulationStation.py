@@ -19,6 +19,7 @@
 ........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
 """
 
+from functools import cache
 # import os
 # import re
 # import xml.dom.minidom as XML
@@ -27,12 +28,15 @@
 # from gamelist_tools.utils.Ubiquitous import get_gamelist_data, parse_value
 
 
+@cache
 def return_mapping(invert: bool = False) -> dict:
   """
     # Return Property mapping dictionary
 
     Map Gamelist object property to XML tag for ES-DE.
 
+    The dictionary is built once per invert and shared between callers, so it must not be modified.
+
     ```python
     eturn_mapping(invert: bool = False) -> dict
     ```
@@ -0,0 +1,214 @@
+#! /usr/bin/env python3
+"""
+ Program: Serialize one imported library to several frontends at once.
+    Name: Andrew Dixon            File: Export.py
+    Date: 17 Oct 2026
+   Notes: The imported gamelists are never modified, each target works on its own copy of the games.
+
+    Copyright (C) 2025  Andrew Dixon
+
+    This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+    warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with this program.
+    If not, see <https://www.gnu.org/licenses/>.
+
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+import os
+import copy
+import traceback
+from collections import Counter
+from typing import Callable, List, Optional
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from gamelist_tools.models.Gamelist import Gamelist, MEDIA_PATHS
+from gamelist_tools.utils import ESDE, Batocera, EmulationStation
+from gamelist_tools.utils.Ubiquitous import write_gamelist, commit_writes
+
+# Frontends a library can be written for, see make_target.
+TARGETS = ('emulationstation', 'batocera', 'esde')
+
+
+@dataclass(slots=True)
+class Target:
+  """
+  # Target
+
+    ```python
+      Target(name: str, mapping: dict, output: str, depth: int = 2, prepend: Optional[str] = 'images', ...)
+    ```
+
+  One frontend to serialize the library for, with its own output root and relative path policy.
+
+  ## Properties
+
+  | Property        | Type                | Description |
+  |:----------------|:--------------------|:--------------------------------------------------------------------------------|
+  | name            | str                 | Name for reporting.                                                             |
+  | mapping         | dict                | Object -> XML tag mapping (inverted map) for the frontend.                      |
+  | output          | str                 | Output root, a directory per system is created under it.                        |
+  | depth           | int                 | How far up media paths to traverse before stopping.                             |
+  | prepend         | Optional[str]       | Directory name to prepend to media paths.                                       |
+  | exclude         | List[str]           | Media properties to leave as they are.                                          |
+  | rel_paths       | bool                | Rewrite media paths relative to the system directory.                           |
+  | media           | bool                | Write media paths at all, off for frontends that find media on their own.       |
+  | prepare         | Callable            | Called with each copied Gamelist before it is written, for frontend tweaks.     |
+  | rootElement     | str                 | Tag name for the document's root element.                                       |
+
+  """
+
+  name: str
+  mapping: dict
+  output: str
+  depth: int = 2
+  prepend: Optional[str] = field(default='images')
+  exclude: List[str] = field(default_factory=list)
+  rel_paths: bool = True
+  media: bool = True
+  prepare: Optional[Callable[[Gamelist], None]] = field(default=None)
+  rootElement: str = 'gameList'
+
+
+def image_fallback(gl: Gamelist) -> None:
+  """Move images around on the games to set what we want showing up for other tags."""
+  for game in gl.games:
+
+    if not game.image:
+      game.image = game.miximage if game.miximage else game.thumbnail
+      # game.image = game.thumbnail if game.thumbnail else game.titleshot
+
+    if not game.thumbnail:
+      game.thumbnail = game.boxfront
+
+
+def make_target(name: str, output: str) -> Target:
+  """Return the Target for a frontend name in TARGETS, writing under output."""
+
+  # REGEX to match .chd in gamelist for converting to .m3u on sd cards.
+  #  <path>\.\/.*\(Disc 1\)\.chd<\/path>
+
+  if name == 'emulationstation':
+    return Target(name, EmulationStation.return_mapping(invert=True), output, prepend='images', prepare=image_fallback)
+
+  if name == 'batocera':
+    return Target(name, Batocera.return_mapping(), output, prepend='images', prepare=image_fallback)
+
+  # ES-DE finds media in its downloaded_media folder, the gamelist is written back as it was read.
+  if name == 'esde':
+    return Target(name, ESDE.return_mapping(), output, media=False)
+
+  raise ValueError(f'Unknown output target: {name}')
+
+
+def copy_gamelist(gamelist: Gamelist) -> Gamelist:
+  """Return a Gamelist holding shallow copies of the games, so paths can be rewritten without touching the original."""
+  copied = Gamelist(
+    path=gamelist.path,
+    system=gamelist.system,
+    xml_decl=gamelist.xml_decl,
+    altemulator=gamelist.altemulator,
+  )
+  copied.extend(copy.copy(game) for game in gamelist.games)
+
+  return copied
+
+
+def export_gamelist(gamelist: Gamelist, target: Target, fsync: str = 'file', pending: list = None) -> str:
+  """
+  # Export gamelist
+
+  Apply a target's path policy to a copy of the gamelist and write it under the target's output root.
+  Returns 'written' or 'skipped', see ```write_gamelist```.
+
+  ```python
+  export_gamelist(gamelist: Gamelist, target: Target, fsync: str = 'file', pending: list = None) -> str
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | gamelist        | Gamelist  | Imported gamelist, it is not modified.                          |
+  | target          | Target    | Frontend to write the gamelist for.                             |
+  | fsync           | str       | One of ```FSYNC_POLICIES```.                                    |
+  | pending         | list      | Batch to add the file to when fsync is 'batch'.                 |
+
+  """
+
+  gamelist = prepare_gamelist(gamelist, target)
+  output_dir = os.path.join(target.output, gamelist.system)
+  return write_gamelist(gamelist, target.mapping, output_dir, target.rootElement, fsync, pending)
+
+
+def prepare_gamelist(gamelist: Gamelist, target: Target) -> Gamelist:
+  """Return a copy of the gamelist with a target's path policy and prepare hook applied, ready to serialize."""
+  gamelist = copy_gamelist(gamelist)
+
+  if not target.media:
+    for game in gamelist.games:
+      for attr in MEDIA_PATHS:
+        setattr(game, attr, None)
+  elif target.rel_paths:
+    gamelist.set_rel_paths(target.depth, target.prepend, target.exclude)
+
+  if target.prepare:
+    target.prepare(gamelist)
+
+  return gamelist
+
+
+def export_gamelists(
+  gamelists: list[Gamelist], targets: list[Target], workers: int = None, fsync: str = 'batch'
+) -> dict:
+  """
+  # Export gamelists
+
+  Serialize an imported library for every target concurrently, so the import is paid for once no matter how
+  many frontends are written. Each (target, system) pair is written from a thread pool and, with fsync 'batch',
+  every file from every target is committed together at the end. A system that fails is reported in the counts
+  as 'failed' without stopping the rest. Returns a dictionary of target name -> count of results.
+
+  ```python
+  export_gamelists(gamelists: list[Gamelist], targets: list[Target], workers: int = None, fsync: str = 'batch')
+  ```
+
+  ## Properties
+
+  | Property        | Type            | Description |
+  |:----------------|:----------------|:----------------------------------------------------------------|
+  | gamelists       | list[Gamelist]  | Imported gamelists, they are not modified.                      |
+  | targets         | list[Target]    | Frontends to write the library for.                             |
+  | workers         | int             | Number of threads writing gamelists.                            |
+  | fsync           | str             | One of ```FSYNC_POLICIES```.                                    |
+
+  """
+
+  pending = []
+  counts = {target.name: Counter() for target in targets}
+
+  with ThreadPoolExecutor(max_workers=workers) as executor:
+    futures = {
+      executor.submit(export_gamelist, gamelist, target, fsync, pending): (target, gamelist)
+      for target in targets
+      for gamelist in gamelists
+    }
+
+    for future, (target, gamelist) in futures.items():
+      try:
+        counts[target.name][future.result()] += 1
+      except Exception as e: #noqa E722 Do not use bare except:
+        print(f'Error processing :: {gamelist.system} :: gamelist for {target.name}!')
+        print(f"Error Type: {type(e).__name__}")
+        print(f"Error Value: {e}")
+        print("\n--- Full Traceback ---")
+        print(''.join(traceback.format_exception(e)))
+        counts[target.name]['failed'] += 1
+
+  commit_writes(pending)
+
+  return {name: dict(count) for name, count in counts.items()}
@@ -0,0 +1,290 @@
+#! /usr/bin/env python3
+"""
+ Program: Hash ROM files to populate md5 and crc32 for gamelist entries.
+    Name: Andrew Dixon            File: Hashing.py
+    Date: 17 Oct 2026
+   Notes:
+
+    Copyright (C) 2025  Andrew Dixon
+
+    This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+    warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with this program.
+    If not, see <https://www.gnu.org/licenses/>.
+
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+import os
+import json
+import stat
+import zlib
+import hashlib
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from gamelist_tools.models.Gamelist import Gamelist
+
+# Read size for hashing. Large reads keep the thread inside hashlib/zlib (which release the GIL) most of the time.
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# Number of hashed files between cache checkpoints, so an interrupted run picks up where it left off.
+CHECKPOINT_EVERY = 100
+
+
+def hash_file(path: str, chunk_size: int = CHUNK_SIZE) -> tuple[str, str]:
+  """
+  # Hash file
+
+  Return the (md5, crc32) of a file, both computed from a single read pass. crc32 is 8 upper case hex digits.
+
+  ```python
+  hash_file(path: str, chunk_size: int = CHUNK_SIZE) -> tuple[str, str]
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------|
+  | path            | str       | The path to the file to hash.               |
+  | chunk_size      | int       | Number of bytes to read at a time.          |
+
+  """
+
+  md5 = hashlib.md5()
+  crc = 0
+  buffer = bytearray(chunk_size)
+  view = memoryview(buffer)
+
+  with open(path, 'rb', buffering=0) as f:
+    while size := f.readinto(buffer):
+      md5.update(view[:size])
+      crc = zlib.crc32(view[:size], crc)
+
+  return (md5.hexdigest(), f'{crc:08X}')
+
+
+def hash_zip(path: str, md5: bool = True, chunk_size: int = CHUNK_SIZE) -> tuple[str, str]:
+  """
+  # Hash zip archive contents
+
+  Return the (md5, crc32) of the single file inside a zip archive without extracting it to disk. The crc32 comes
+  straight from the zip central directory, nothing is decompressed unless the md5 is asked for, in which case the
+  member is streamed through a bounded buffer. Archives holding more than one file (arcade sets) are hashed as
+  the archive file itself, the same as any other ROM. A member the standard library can't decompress (Deflate64
+  or encrypted) is returned with its crc32 and no md5.
+
+  ```python
+  hash_zip(path: str, md5: bool = True, chunk_size: int = CHUNK_SIZE) -> tuple[str, str]
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------------------|
+  | path            | str       | The path to the zip archive.                            |
+  | md5             | bool      | Decompress the member to compute the md5 as well.       |
+  | chunk_size      | int       | Number of bytes to decompress at a time.                |
+
+  """
+
+  with zipfile.ZipFile(path) as archive:
+    members = [info for info in archive.infolist() if not info.is_dir()]
+
+    if len(members) != 1:
+      return hash_file(path, chunk_size)
+
+    member = members[0]
+    crc = f'{member.CRC:08X}'
+    if not md5:
+      return (None, crc)
+
+    # Compression methods the standard library can't decompress (Deflate64) and encrypted members keep the crc32.
+    digest = hashlib.md5()
+    try:
+      with archive.open(member) as f:
+        while chunk := f.read(chunk_size):
+          digest.update(chunk)
+    except (NotImplementedError, RuntimeError, zlib.error):
+      return (None, crc)
+
+  return (digest.hexdigest(), crc)
+
+
+def hash_rom(path: str, md5: bool = True, chunk_size: int = CHUNK_SIZE) -> tuple[str, str]:
+  """
+  # Hash ROM
+
+  Return the (md5, crc32) for a ROM file. Zip archives are hashed by their contents with ```hash_zip```, any
+  other file (including 7z, which the standard library can't read) is hashed as is with ```hash_file```, as is a
+  zip that can't be read as one.
+
+  ```python
+  hash_rom(path: str, md5: bool = True, chunk_size: int = CHUNK_SIZE) -> tuple[str, str]
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------------------|
+  | path            | str       | The path to the ROM file.                               |
+  | md5             | bool      | Compute the md5 for zip contents as well as the crc32.  |
+  | chunk_size      | int       | Number of bytes to read at a time.                      |
+
+  """
+
+  if path.lower().endswith('.zip'):
+    try:
+      return hash_zip(path, md5, chunk_size)
+    except (zipfile.BadZipFile, NotImplementedError, RuntimeError, zlib.error):
+      pass
+
+  return hash_file(path, chunk_size)
+
+
+def load_hash_cache(path: str) -> dict:
+  """
+  # Load hash cache
+
+  Return the hash cache dictionary of file path -> [size, mtime_ns, md5, crc32]. A missing or unreadable cache
+  returns an empty dictionary.
+
+  ```python
+  load_hash_cache(path: str) -> dict
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------|
+  | path            | str       | The path to the hash cache file.            |
+
+  """
+
+  try:
+    with open(path, 'r') as f:
+      return json.load(f)
+  except (OSError, ValueError):
+    return {}
+
+
+def save_hash_cache(path: str, entries: dict) -> None:
+  """
+  # Save hash cache
+
+  Write the hash cache to disk through a temporary file so an interrupted write never corrupts it.
+
+  ```python
+  save_hash_cache(path: str, entries: dict) -> None
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------|
+  | path            | str       | The path to the hash cache file.            |
+  | entries         | dict      | Hash cache dictionary to store.             |
+
+  """
+
+  os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+  temp_path = f'{path}.tmp'
+  with open(temp_path, 'w') as f:
+    json.dump(entries, f)
+
+  os.replace(temp_path, path)
+
+
+def rom_path(rom_directory: str, system: str, path: str) -> str:
+  """Return the full path to a game's ROM from the gamelist path, which is relative to the system's ROM folder."""
+  return os.path.normpath(os.path.join(rom_directory, system, os.path.expanduser(path)))
+
+
+def hash_roms(
+  gamelists: list[Gamelist], rom_directory: str, workers: int = 4, cache: str = None, md5: bool = True
+) -> int:
+  """
+  # Hash ROMs
+
+  Populate ```md5``` and ```crc32``` for every game whose ROM file exists under the ROM directory. Files are
+  hashed from a thread pool and results are cached by (path, size, mtime) so unchanged ROMs are never read
+  twice. The cache is checkpointed as files finish, so an interrupted run resumes instead of starting over.
+  Returns the number of files that had to be read.
+
+  Zip archives holding a single file are hashed by their contents. With ```md5``` off their crc32 is read from
+  the zip directory without decompressing anything.
+
+  ```python
+  hash_roms(gamelists, rom_directory, workers=4, cache=None, md5=True) -> int
+  ```
+
+  ## Properties
+
+  | Property        | Type            | Description |
+  |:----------------|:----------------|:--------------------------------------------------------|
+  | gamelists       | list[Gamelist]  | Gamelists to populate hashes for.                       |
+  | rom_directory   | str             | The ROM root containing a folder per system.            |
+  | workers         | int             | Number of threads reading files.                        |
+  | cache           | str             | Path to the hash cache file (opt-in).                   |
+  | md5             | bool            | Compute md5 for zip contents (requires decompressing).  |
+
+  """
+
+  entries = load_hash_cache(cache) if cache else {}
+
+  # Group the games by ROM file, a file can be listed more than once.
+  games = {}
+  states = {}
+  for gamelist in gamelists:
+    for game in gamelist.games:
+      if not game.path:
+        continue
+
+      path = rom_path(rom_directory, gamelist.system, game.path)
+      if path not in states:
+        try:
+          info = os.stat(path)
+        except OSError:
+          continue
+
+        # Folders (multi-disc or PC games) have no single file to hash.
+        if not stat.S_ISREG(info.st_mode):
+          continue
+
+        states[path] = (info.st_size, info.st_mtime_ns)
+
+      games.setdefault(path, []).append(game)
+
+  # Rehash files that changed, and ones cached without an md5 when one is wanted now.
+  pending = [
+    path for path, state in states.items()
+    if path not in entries or tuple(entries[path][:2]) != state or (md5 and entries[path][2] is None)
+  ]
+
+  with ThreadPoolExecutor(max_workers=workers) as executor:
+    futures = {executor.submit(hash_rom, path, md5): path for path in pending}
+
+    for done, future in enumerate(as_completed(futures), start=1):
+      path = futures[future]
+      try:
+        entries[path] = [*states[path], *future.result()]
+      except Exception as e:
+        print(f'An error occurred while hashing {path}: {e}')
+
+      if cache and done % CHECKPOINT_EVERY == 0:
+        save_hash_cache(cache, entries)
+
+  if cache:
+    save_hash_cache(cache, entries)
+
+  # Set the hashes on every game that points at a hashed file.
+  for path, listed in games.items():
+    if path in entries and tuple(entries[path][:2]) == states[path]:
+      for game in listed:
+        game.md5, game.crc32 = entries[path][2], entries[path][3]
+
+  return len(pending)
@@ -0,0 +1,336 @@
+#! /usr/bin/env python3
+"""
+ Program: Copy the scraped media referenced by gamelists into the output directory structure.
+    Name: Andrew Dixon            File: MediaSync.py
+    Date: 17 Oct 2026
+   Notes: Run before Gamelist.set_rel_paths, the games still need to point at the source media.
+
+    Copyright (C) 2025  Andrew Dixon
+
+    This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+    warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with this program.
+    If not, see <https://www.gnu.org/licenses/>.
+
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+import os
+import shutil
+import hashlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from gamelist_tools.models.Gamelist import Gamelist, MEDIA_PATHS, rel_path
+
+try:
+  import fcntl
+except ImportError:  # Windows
+  fcntl = None
+
+# ioctl request to clone a file's extents on Linux (btrfs, XFS, bcachefs...).
+FICLONE = 0x40049409
+
+# Ways a file can be put in place, tried in this order for mode 'auto'.
+SYNC_MODES = ('hardlink', 'reflink', 'copy')
+
+
+def media_targets(
+  gamelist: Gamelist, output: str, depth: int = 2, prepend: str = 'images', exclude: list[str] = None
+) -> dict:
+  """
+  # Media targets
+
+  Return a dictionary of destination path -> source path for every media file a gamelist references. Destinations
+  are the paths ```Gamelist.set_rel_paths``` will point the games at, under the system's output directory.
+
+  ```python
+  media_targets(gamelist, output, depth=2, prepend='images', exclude=None) -> dict
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | gamelist        | Gamelist  | Gamelist whose media paths still point at the source files.     |
+  | output          | str       | Output root, the system directory is created under it.          |
+  | depth           | int       | How far up the path to traverse before stopping.                |
+  | prepend         | str       | Directory name to prepend to the path.                          |
+  | exclude         | list[str] | List of properties to leave out.                                |
+
+  """
+
+  paths = [item for item in MEDIA_PATHS if not exclude or item not in exclude]
+  system_dir = os.path.join(output, gamelist.system)
+  targets = {}
+
+  for game in gamelist.games:
+    for attr in paths:
+      source = getattr(game, attr)
+
+      # Only absolute paths point at scraped media, relative ones have already been rewritten.
+      if source and os.path.isabs(source):
+        targets[os.path.normpath(os.path.join(system_dir, rel_path(source, depth, prepend)))] = source
+
+  return targets
+
+
+def up_to_date(source: os.stat_result, destination: str) -> bool:
+  """Return if the destination already holds the source file (same inode, or same size and mtime)."""
+  try:
+    current = os.stat(destination)
+  except OSError:
+    return False
+
+  if (current.st_dev, current.st_ino) == (source.st_dev, source.st_ino):
+    return True
+
+  return current.st_size == source.st_size and current.st_mtime_ns == source.st_mtime_ns
+
+
+def reflink(source: str, destination: str) -> None:
+  """Clone source into destination with the FICLONE ioctl. Raises OSError where it isn't supported."""
+  if fcntl is None:
+    raise OSError('reflinks are not supported on this platform')
+
+  with open(source, 'rb') as src, open(destination, 'wb') as dst:
+    try:
+      fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+      dst.close()
+      os.unlink(destination)
+      raise
+
+  shutil.copystat(source, destination)
+
+
+def place_file(source: str, destination: str, mode: str = 'auto') -> str:
+  """
+  # Place file
+
+  Put a source file at the destination, preferring a hardlink, then a reflink, then a copy (which uses the
+  kernel's in-kernel copy where available). Files that are already in place are left alone. Returns what was
+  done: 'hardlink', 'reflink', 'copy', 'skipped' or 'missing'.
+
+  ```python
+  place_file(source: str, destination: str, mode: str = 'auto') -> str
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | source          | str       | The path to the source media file.                              |
+  | destination     | str       | The path the file should end up at.                             |
+  | mode            | str       | 'auto', or one of 'hardlink', 'reflink' or 'copy' only.         |
+
+  """
+
+  try:
+    stat = os.stat(source)
+  except OSError:
+    return 'missing'
+
+  if up_to_date(stat, destination):
+    return 'skipped'
+
+  # Links can't replace an existing file.
+  if os.path.lexists(destination):
+    os.unlink(destination)
+
+  modes = SYNC_MODES if mode == 'auto' else (mode,)
+  for attempt in modes:
+    try:
+      if attempt == 'hardlink':
+        os.link(source, destination)
+      elif attempt == 'reflink':
+        reflink(source, destination)
+      else:
+        shutil.copy2(source, destination)
+
+      return attempt
+
+    # Different filesystem, or one that doesn't support the link type, fall through to the next.
+    except OSError:
+      if attempt == modes[-1]:
+        raise
+
+  return 'missing'
+
+
+def content_hash(path: str) -> str:
+  """Return the sha256 hex digest of a file's contents."""
+  with open(path, 'rb') as f:
+    return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def find_duplicates(sources: list[str], workers: int = 8) -> dict:
+  """
+  # Find duplicate media
+
+  Group files with identical contents. Files are first grouped by size and only files sharing a size are hashed,
+  so unique files are never read. Returns a dictionary of source path -> content hash for every file that has at
+  least one duplicate.
+
+  ```python
+  find_duplicates(sources: list[str], workers: int = 8) -> dict
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | sources         | list[str] | Paths to the media files to check.                              |
+  | workers         | int       | Number of threads hashing files.                                |
+
+  """
+
+  sizes = {}
+  for source in set(sources):
+    try:
+      sizes.setdefault(os.stat(source).st_size, []).append(source)
+    except OSError:
+      continue
+
+  candidates = [source for group in sizes.values() if len(group) > 1 for source in group]
+
+  with ThreadPoolExecutor(max_workers=workers) as executor:
+    digests = dict(zip(candidates, executor.map(content_hash, candidates)))
+
+  counts = Counter(digests.values())
+  return {source: digest for source, digest in digests.items() if counts[digest] > 1}
+
+
+def dedupe_media(gamelists: list[Gamelist], workers: int = 8, exclude: list[str] = None) -> dict:
+  """
+  # Deduplicate media
+
+  Point every game at a single copy of each distinct media file. Within a system, games whose media has the same
+  contents as another file are switched to the first such file (by path), so only one copy is written to that
+  system's output. Run before ```sync_media```. Returns a dictionary of source path -> content hash for the
+  duplicates that are left across systems, which ```sync_media``` links together instead of copying.
+
+  ```python
+  dedupe_media(gamelists: list[Gamelist], workers: int = 8, exclude: list[str] = None) -> dict
+  ```
+
+  ## Properties
+
+  | Property        | Type            | Description |
+  |:----------------|:----------------|:----------------------------------------------------------------|
+  | gamelists       | list[Gamelist]  | Gamelists whose media paths still point at the source files.    |
+  | workers         | int             | Number of threads hashing files.                                |
+  | exclude         | list[str]       | List of properties to leave out.                                |
+
+  """
+
+  paths = [item for item in MEDIA_PATHS if not exclude or item not in exclude]
+  sources = [
+    getattr(game, attr)
+    for gamelist in gamelists
+    for game in gamelist.games
+    for attr in paths
+    if getattr(game, attr) and os.path.isabs(getattr(game, attr))
+  ]
+  duplicates = find_duplicates(sources, workers)
+
+  for gamelist in gamelists:
+    # First file (by path) for each content hash within this system.
+    canonical = {}
+    for game in gamelist.games:
+      for attr in paths:
+        source = getattr(game, attr)
+        if source in duplicates:
+          digest = duplicates[source]
+          canonical[digest] = min(canonical.get(digest, source), source)
+
+    for game in gamelist.games:
+      for attr in paths:
+        source = getattr(game, attr)
+        if source in duplicates:
+          setattr(game, attr, canonical[duplicates[source]])
+
+  return duplicates
+
+
+def sync_media(
+  gamelists: list[Gamelist],
+  output: str,
+  mode: str = 'auto',
+  workers: int = 8,
+  depth: int = 2,
+  prepend: str = 'images',
+  exclude: list[str] = None,
+  duplicates: dict = None,
+) -> dict:
+  """
+  # Sync media
+
+  Materialize every media file referenced by the gamelists under the output directory, at the paths
+  ```Gamelist.set_rel_paths``` (with the same depth, prepend and exclude) will point them at. Files are
+  placed in parallel and ones already up to date are skipped, so repeat syncs only touch what changed. Returns
+  a count of what was done to each file.
+
+  Pass the result of ```dedupe_media``` as ```duplicates``` to write each distinct file once and hardlink the
+  other destinations to it where the output filesystem allows.
+
+  ```python
+  sync_media(gamelists, output, mode='auto', workers=8, depth=2, prepend='images', exclude=None, duplicates=None)
+  ```
+
+  ## Properties
+
+  | Property        | Type            | Description |
+  |:----------------|:----------------|:----------------------------------------------------------------|
+  | gamelists       | list[Gamelist]  | Gamelists whose media paths still point at the source files.    |
+  | output          | str             | Output root, a directory per system is created under it.        |
+  | mode            | str             | 'auto', or one of 'hardlink', 'reflink' or 'copy' only.         |
+  | workers         | int             | Number of threads placing files.                                |
+  | depth           | int             | How far up the path to traverse before stopping.                |
+  | prepend         | str             | Directory name to prepend to the path.                          |
+  | exclude         | list[str]       | List of properties to leave out.                                |
+  | duplicates      | dict            | Source path -> content hash from ```dedupe_media```.            |
+
+  """
+
+  if mode != 'auto' and mode not in SYNC_MODES:
+    raise ValueError(f'Unknown media sync mode: {mode}')
+
+  targets = {}
+  for gamelist in gamelists:
+    targets.update(media_targets(gamelist, output, depth, prepend, exclude))
+
+  # Create the directories up front so the workers only deal with files.
+  for directory in {os.path.dirname(destination) for destination in targets}:
+    os.makedirs(directory, exist_ok=True)
+
+  # Destinations with the same contents are written once, the rest are linked to the first copy afterwards.
+  linked = {}
+  if duplicates:
+    primary = {}
+    for destination in sorted(targets):
+      digest = duplicates.get(targets[destination])
+      if digest is None:
+        continue
+
+      if digest in primary:
+        linked[destination] = primary[digest]
+      else:
+        primary[digest] = destination
+
+    for destination in linked:
+      del targets[destination]
+
+  counts = Counter()
+  with ThreadPoolExecutor(max_workers=workers) as executor:
+    for result in executor.map(lambda item: place_file(item[1], item[0], mode), targets.items()):
+      counts[result] += 1
+
+    # Hardlink where the filesystem supports it, otherwise fall back to the normal placement.
+    for result in executor.map(lambda item: place_file(item[1], item[0], 'auto'), linked.items()):
+      counts['deduplicated' if result in ('hardlink', 'skipped') else result] += 1
+
+  return dict(counts)
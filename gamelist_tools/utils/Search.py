@@ -0,0 +1,345 @@
+#! /usr/bin/env python3
+"""
+ Program: Full text search over game names and descriptions.
+    Name: Andrew Dixon            File: Search.py
+    Date: 17 Oct 2026
+   Notes: The index is kept per system so only systems whose gamelist file changed are indexed again.
+
+    Copyright (C) 2025  Andrew Dixon
+
+    This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+    warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with this program.
+    If not, see <https://www.gnu.org/licenses/>.
+
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+import os
+import re
+import math
+import heapq
+import pickle
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List
+from dataclasses import dataclass, field
+from gamelist_tools.models.Gamelist import Gamelist, Game
+from gamelist_tools.utils.Cache import file_state
+
+# Bump when the stored index changes shape so old indexes are rebuilt instead of loaded.
+SEARCH_VERSION = 1
+
+# Attributes that are searched and how much a match in each counts towards a game's score.
+SEARCH_FIELDS = {
+  'name': 3.0,
+  'sortname': 2.0,
+  'description': 1.0,
+}
+
+# Words are runs of letters and digits.
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+  """Return the casefolded words in a string."""
+  return TOKEN_PATTERN.findall(text.casefold()) if text else []
+
+
+def index_gamelist(gamelist: Gamelist) -> dict:
+  """
+  # Index gamelist
+
+  Return the search index for one system: the gamelist file state it was built from, the path of each game
+  (document) and term -> {document: weight}. A term's weight is the log damped, field weighted count of the
+  term in the game's name, sortname and description.
+
+  ```python
+  index_gamelist(gamelist: Gamelist) -> dict
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | gamelist        | Gamelist  | Gamelist to index.                                              |
+
+  """
+
+  postings = {}
+  paths = []
+
+  for document, game in enumerate(gamelist.games):
+    paths.append(game.path)
+
+    counts = Counter()
+    for attr, weight in SEARCH_FIELDS.items():
+      for term in tokenize(getattr(game, attr)):
+        counts[term] += weight
+
+    for term, count in counts.items():
+      postings.setdefault(term, {})[document] = 1 + math.log(count)
+
+  return {'key': file_state(gamelist.path), 'paths': paths, 'postings': postings}
+
+
+@dataclass(slots=True)
+class SearchIndex:
+  """
+  # SearchIndex
+
+    ```python
+      SearchIndex(systems: Dict[str, dict] = {})
+    ```
+
+  Inverted index over the name, sortname and description of every game in a library. Build or refresh it with
+  ```update```, then query with ```search```. Only ```systems``` is stored by ```save_search_index```, the games
+  are bound again by ```update``` when it is loaded.
+
+  ## Properties
+
+  | Property        | Type                | Description |
+  |:----------------|:--------------------|:--------------------------------------------------------------------------------------|
+  | systems         | Dict[str, dict]     | System -> index from ```index_gamelist```.                                            |
+
+  """
+
+  systems: Dict[str, dict] = field(default_factory=dict)
+  _games: Dict[str, List[Game]] = field(default_factory=dict, init=False, repr=False, compare=False)
+  _terms: Dict[str, List[str]] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+
+  def __len__(self) -> int:
+    """Return the number of games in the index."""
+    return sum(len(system['paths']) for system in self.systems.values())
+
+
+  def update(self, gamelists: List[Gamelist]) -> int:
+    """
+    # Update index
+
+      ```python
+        SearchIndex.update(gamelists: List[Gamelist]) -> int
+      ```
+
+    Bring the index in line with a library. Systems whose gamelist file is unchanged since they were indexed are
+    kept, the rest are indexed again and systems that are no longer in the library are dropped. Search hits are
+    the Game objects in these gamelists. Returns the number of systems that were indexed.
+
+    ## Properties
+
+    | Property        | Type            | Description |
+    |:----------------|:----------------|:----------------------------------------------------------------|
+    | gamelists       | List[Gamelist]  | The library to search.                                          |
+
+    """
+
+    indexed = 0
+    current = {}
+
+    for gamelist in gamelists:
+      system = self.systems.get(gamelist.system)
+      key = file_state(gamelist.path)
+
+      if system is None or key[0] is None or system['key'] != key:
+        system = index_gamelist(gamelist)
+        indexed += 1
+        self._terms.pop(gamelist.system, None)
+
+      current[gamelist.system] = system
+      self._games[gamelist.system] = [gamelist.get(path) for path in system['paths']]
+
+    for name in self.systems.keys() - current.keys():
+      self._games.pop(name, None)
+      self._terms.pop(name, None)
+
+    self.systems = current
+    return indexed
+
+
+  def expand(self, system: str, term: str, prefix: bool) -> List[str]:
+    """Return the indexed terms in a system matching a query term, every term starting with it for a prefix."""
+    postings = self.systems[system]['postings']
+
+    if not prefix:
+      return [term] if term in postings else []
+
+    terms = self._terms.get(system)
+    if terms is None:
+      terms = self._terms[system] = sorted(postings)
+
+    matched = []
+    for position in range(bisect_left(terms, term), len(terms)):
+      if not terms[position].startswith(term):
+        break
+      matched.append(terms[position])
+
+    return matched
+
+
+  def hits(self, query: str, limit: int = 20, prefix: bool = False, systems: List[str] = None) -> List[tuple]:
+    """
+    # Search hits
+
+      ```python
+        SearchIndex.hits(query: str, limit: int = 20, prefix: bool = False, systems: List[str] = None) -> List[tuple]
+      ```
+
+    Return up to limit (score, system, Game) tuples, best first, for the games containing every word in the query.
+    Scores add up each word's weight in the game times how rare the word is across the searched games. With
+    prefix each word also matches any word starting with it (so "mar" finds "Mario").
+
+    ## Properties
+
+    | Property        | Type      | Description |
+    |:----------------|:----------|:----------------------------------------------------------------|
+    | query           | str       | Words to search for.                                            |
+    | limit           | int       | Maximum number of hits to return.                               |
+    | prefix          | bool      | Match words by prefix.                                          |
+    | systems         | List[str] | Only search these systems.                                      |
+
+    """
+
+    terms = list(dict.fromkeys(tokenize(query)))
+    names = [name for name in (systems or self.systems) if name in self.systems]
+    if not terms or not names:
+      return []
+
+    # Documents matching each query term in each system, with the best weight among the expanded terms.
+    matches = {}
+    frequency = Counter()
+    total = 0
+
+    for name in names:
+      postings = self.systems[name]['postings']
+      total += len(self.systems[name]['paths'])
+
+      for term in terms:
+        found = {}
+        for expanded in self.expand(name, term, prefix):
+          for document, weight in postings[expanded].items():
+            if weight > found.get(document, 0):
+              found[document] = weight
+
+        matches[(name, term)] = found
+        frequency[term] += len(found)
+
+    rarity = {term: math.log(1 + total / frequency[term]) if frequency[term] else 0 for term in terms}
+
+    scored = []
+    for name in names:
+      found = [matches[(name, term)] for term in terms]
+
+      # Every term has to match, start from the rarest to keep the candidates small.
+      candidates = set(min(found, key=len))
+      for documents in found:
+        candidates &= documents.keys()
+
+      games = self._games.get(name, [])
+      for document in candidates:
+        if document < len(games) and games[document] is not None:
+          score = sum(documents[document] * rarity[term] for term, documents in zip(terms, found))
+          scored.append((score, name, document))
+
+    best = heapq.nsmallest(limit, scored, key=lambda hit: (-hit[0], hit[1], hit[2]))
+    return [(score, name, self._games[name][document]) for score, name, document in best]
+
+
+  def search(self, query: str, limit: int = 20, prefix: bool = False, systems: List[str] = None) -> List[Game]:
+    """Return up to limit Games matching every word in the query, best first. See ```hits``` for the details."""
+    return [game for _, _, game in self.hits(query, limit, prefix, systems)]
+
+
+def load_search_index(path: str) -> SearchIndex:
+  """
+  # Load search index
+
+  Load a search index saved by ```save_search_index```. A missing, unreadable or out of date file returns an empty
+  index. Call ```SearchIndex.update``` with the library before searching.
+
+  ```python
+  load_search_index(path: str) -> SearchIndex
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------|
+  | path            | str       | The path to the search index file.          |
+
+  """
+
+  try:
+    with open(path, 'rb') as f:
+      version, systems = pickle.load(f)
+  except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError):
+    return SearchIndex()
+
+  return SearchIndex(systems=systems) if version == SEARCH_VERSION else SearchIndex()
+
+
+def save_search_index(path: str, index: SearchIndex) -> None:
+  """
+  # Save search index
+
+  Write the search index to disk through a temporary file so an interrupted write never corrupts it.
+
+  ```python
+  save_search_index(path: str, index: SearchIndex) -> None
+  ```
+
+  ## Properties
+
+  | Property        | Type        | Description |
+  |:----------------|:------------|:--------------------------------------------|
+  | path            | str         | The path to the search index file.          |
+  | index           | SearchIndex | The index to store.                         |
+
+  """
+
+  os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+  temp_path = f'{path}.tmp'
+  with open(temp_path, 'wb') as f:
+    pickle.dump((SEARCH_VERSION, index.systems), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+  os.replace(temp_path, path)
+
+
+def search_index_path(cache: str) -> str:
+  """Return where the search index is kept for an import cache file, next to it."""
+  return f'{cache}.search'
+
+
+def open_search_index(gamelists: List[Gamelist], path: str = None) -> SearchIndex:
+  """
+  # Open search index
+
+  Return a search index for a library, reusing the systems stored at path that haven't changed and saving it
+  back if anything had to be indexed. Without a path the index is built in memory only.
+
+  ```python
+  open_search_index(gamelists: List[Gamelist], path: str = None) -> SearchIndex
+  ```
+
+  ## Properties
+
+  | Property        | Type            | Description |
+  |:----------------|:----------------|:----------------------------------------------------------------|
+  | gamelists       | List[Gamelist]  | The library to search.                                          |
+  | path            | str             | The path to the search index file (opt-in).                     |
+
+  """
+
+  index = load_search_index(path) if path else SearchIndex()
+  stored = set(index.systems)
+
+  indexed = index.update(gamelists)
+  if path and (indexed or stored != set(index.systems)):
+    save_search_index(path, index)
+
+  return index
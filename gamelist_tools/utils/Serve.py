@@ -0,0 +1,288 @@
+#! /usr/bin/env python3
+"""
+ Program: Local HTTP/JSON service answering queries against an in-memory library.
+    Name: Andrew Dixon            File: Serve.py
+    Date: 17 Oct 2026
+   Notes: Meant for tools on the same machine or network, there is no authentication.
+
+    GET  /systems                             List systems and their game counts.
+    GET  /systems/<system>/games              Page through a system's games, see Library.games for the parameters.
+    GET  /games                               Page through every system's games.
+    GET  /search?q=<words>                    Full text search (&prefix=1, &system=<system>, &limit=<n>).
+    GET  /systems/<system>/gamelist.xml       Render a system's gamelist (?target=emulationstation|batocera|esde).
+    POST /reload                              Reparse the library and drop the rendered gamelists.
+
+    Copyright (C) 2025  Andrew Dixon
+
+    This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+    warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with this program.
+    If not, see <https://www.gnu.org/licenses/>.
+
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+import json
+import time
+import threading
+from urllib.parse import urlsplit, parse_qsl, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from gamelist_tools.models.Gamelist import Game, GAME_FIELDS, INDEXES, filter_gamelists, parse_filter
+from gamelist_tools.utils.ESDE import parse_gamelist_data
+from gamelist_tools.utils.Export import TARGETS, make_target, prepare_gamelist
+from gamelist_tools.utils.Search import SearchIndex, open_search_index, search_index_path
+from gamelist_tools.utils.Ubiquitous import gen_xml
+
+# Number of games returned per page unless asked for otherwise, and the most that can be asked for.
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def game_to_dict(game: Game) -> dict:
+  """Return the attributes that are set on a Game as a dictionary."""
+  return {attr: value for attr in GAME_FIELDS if (value := getattr(game, attr)) is not None}
+
+
+def filter_value(criterion: str, value: str):
+  """Return a query string filter value ready for ```Gamelist.filter```. Ordering comparisons on fields without
+  an index are made against a number when the value is one, so ratings and play counts compare by value."""
+  name, op = parse_filter(criterion)
+  if name in INDEXES or op in ('eq', 'ne'):
+    return value
+
+  try:
+    return float(value)
+  except ValueError:
+    return value
+
+
+class Library:
+  """
+  # Library
+
+    ```python
+      Library(esde_path: str, workers: int = None, cache: str = None)
+    ```
+
+  An ES-DE library parsed once and kept in memory for answering queries. Rendered gamelists are cached per
+  system and target until the library is reloaded. The search index is built on the first search and, with an
+  import cache, stored next to it.
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:------------------------------------------------------------|
+  | esde_path       | str       | The path to the ES-DE user directory.                       |
+  | workers         | int       | Number of worker processes to parse systems with (opt-in).  |
+  | cache           | str       | Path to the import cache file (opt-in).                     |
+
+  """
+
+  def __init__(self, esde_path: str, workers: int = None, cache: str = None):
+    self.esde_path = esde_path
+    self.workers = workers
+    self.cache = cache
+    self.lock = threading.Lock()
+    self.search_lock = threading.Lock()
+    self.gamelists = {}
+    self.renders = {}
+    self.search_index = None
+    self.loaded = None
+    self.reload()
+
+
+  def reload(self) -> int:
+    """Reparse the library and drop every rendered gamelist. Returns the number of systems loaded."""
+    with self.lock:
+      gamelists = parse_gamelist_data(self.esde_path, workers=self.workers, cache=self.cache)
+      for gamelist in gamelists:
+        gamelist.sort()
+
+      # Swap in new dictionaries rather than clearing the old ones, so requests already running on the old
+      # library finish against it and a render of old data can't land in the new cache.
+      self.gamelists = {gamelist.system: gamelist for gamelist in sorted(gamelists)}
+      self.renders = {}
+      self.search_index = None
+      self.loaded = time.time()
+
+    return len(self.gamelists)
+
+
+  def systems(self) -> list[dict]:
+    """Return the name, game count and gamelist path of every system."""
+    return [
+      {'system': gamelist.system, 'games': len(gamelist), 'path': gamelist.path}
+      for gamelist in self.gamelists.values()
+    ]
+
+
+  def games(self, system: str = None, offset: int = 0, limit: int = PAGE_SIZE, **filters) -> dict:
+    """
+    # Page through games
+
+    Return a page of games, for one system or all of them, that match every filter. Filters are the same as
+    ```Gamelist.filter``` takes (attribute=value or attribute__op=value, with ```genre```, ```year``` and
+    ```players``` answered from its indexes). Raises KeyError for an unknown system and ValueError for an unknown
+    attribute or operation.
+
+    ```python
+    Library.games(system='snes', offset=0, limit=100, developer='Capcom', genre='Shooter', players__ge=2)
+    ```
+
+    """
+
+    gamelists = self.gamelists
+    selected = [gamelists[system]] if system else list(gamelists.values())
+    criteria = {criterion: filter_value(criterion, value) for criterion, value in filters.items()}
+
+    found = [
+      (gamelist.system, game)
+      for gamelist in filter_gamelists(selected, **criteria)
+      for game in gamelist.games
+    ]
+
+    page = found[offset:offset + limit]
+    return {
+      'total': len(found),
+      'offset': offset,
+      'limit': limit,
+      'games': [{'system': system, **game_to_dict(game)} for system, game in page],
+    }
+
+
+  def search(self, query: str, limit: int = 20, prefix: bool = False, system: str = None) -> dict:
+    """Return the games best matching a full text query, see ```SearchIndex.hits```."""
+    index = self.get_search_index()
+
+    if system and system not in index.systems:
+      raise KeyError(system)
+
+    hits = index.hits(query, limit, prefix, [system] if system else None)
+    return {
+      'total': len(hits),
+      'games': [{'system': name, 'score': round(score, 4), **game_to_dict(game)} for score, name, game in hits],
+    }
+
+
+  def get_search_index(self) -> SearchIndex:
+    """Return the search index for the current library, building it the first time it is needed."""
+    index = self.search_index
+    if index is not None:
+      return index
+
+    with self.search_lock:
+      if self.search_index is None:
+        path = search_index_path(self.cache) if self.cache else None
+        self.search_index = open_search_index(list(self.gamelists.values()), path)
+
+      return self.search_index
+
+
+  def render(self, system: str, target: str) -> bytes:
+    """Return a system's gamelist.xml rendered for a target in TARGETS. Raises KeyError for an unknown system."""
+    renders = self.renders
+    key = (system, target)
+
+    document = renders.get(key)
+    if document is None:
+      output = make_target(target, '')
+      gamelist = prepare_gamelist(self.gamelists[system], output)
+      document = renders[key] = gen_xml(gamelist, output.mapping, output.rootElement).encode('utf-8')
+
+    return document
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+  """Answer requests against the Library held by the server."""
+
+  def send(self, status: int, body: bytes, content_type: str) -> None:
+    self.send_response(status)
+    self.send_header('Content-Type', content_type)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+
+  def send_json(self, data, status: int = 200) -> None:
+    self.send(status, json.dumps(data).encode('utf-8'), 'application/json')
+
+
+  def do_GET(self) -> None:
+    url = urlsplit(self.path)
+    parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+    params = dict(parse_qsl(url.query))
+    library = self.server.library
+
+    try:
+      if parts == ['systems']:
+        self.send_json({'systems': library.systems()})
+
+      elif parts == ['games'] or (len(parts) == 3 and parts[0] == 'systems' and parts[2] == 'games'):
+        offset = max(int(params.pop('offset', 0)), 0)
+        limit = min(max(int(params.pop('limit', PAGE_SIZE)), 0), MAX_PAGE_SIZE)
+        system = parts[1] if len(parts) == 3 else params.pop('system', None)
+        self.send_json(library.games(system, offset, limit, **params))
+
+      elif parts == ['search']:
+        limit = min(max(int(params.get('limit', PAGE_SIZE)), 0), MAX_PAGE_SIZE)
+        prefix = params.get('prefix', '').casefold() in ('1', 'true', 'yes')
+        self.send_json(library.search(params.get('q', ''), limit, prefix, params.get('system')))
+
+      elif len(parts) == 3 and parts[0] == 'systems' and parts[2] == 'gamelist.xml':
+        target = params.get('target', TARGETS[0])
+        if target not in TARGETS:
+          raise ValueError(f'Unknown target: {target}')
+        self.send(200, library.render(parts[1], target), 'application/xml; charset=utf-8')
+
+      else:
+        self.send_json({'error': f'Not found: {url.path}'}, 404)
+
+    except KeyError as e:
+      self.send_json({'error': f'Unknown system: {e.args[0]}'}, 404)
+    except ValueError as e:
+      self.send_json({'error': str(e)}, 400)
+
+
+  def do_POST(self) -> None:
+    if urlsplit(self.path).path.strip('/') != 'reload':
+      self.send_json({'error': f'Not found: {self.path}'}, 404)
+      return
+
+    start = time.perf_counter()
+    systems = self.server.library.reload()
+    self.send_json({'systems': systems, 'seconds': time.perf_counter() - start})
+
+
+def serve(esde_path: str, host: str = '127.0.0.1', port: int = 8080, workers: int = None, cache: str = None) -> None:
+  """
+  # Serve library
+
+  Load the ES-DE library once and answer HTTP/JSON requests against it until interrupted. Requests are handled on
+  a thread each.
+
+  ```python
+  serve(esde_path: str, host: str = '127.0.0.1', port: int = 8080, workers: int = None, cache: str = None)
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:------------------------------------------------------------|
+  | esde_path       | str       | The path to the ES-DE user directory.                       |
+  | host            | str       | Address to listen on.                                       |
+  | port            | int       | Port to listen on.                                          |
+  | workers         | int       | Number of worker processes to parse systems with (opt-in).  |
+  | cache           | str       | Path to the import cache file (opt-in).                     |
+
+  """
+
+  library = Library(esde_path, workers, cache)
+
+  with ThreadingHTTPServer((host, port), RequestHandler) as server:
+    server.library = library
+    print(f'[+] Serving {len(library.gamelists)} systems on http://{host}:{server.server_address[1]}/')
+    server.serve_forever()
@@ -19,11 +19,28 @@
 """
 
 import os
+import io
 import re
+import hashlib
 import xml.dom.minidom as XML
+import xml.etree.ElementTree as ET
 from pathlib import Path
+from operator import attrgetter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, TextIO
 # from ..models.Gamelist import RawGamelist, Gamelist, Game
-from gamelist_tools.models.Gamelist import RawGamelist, Gamelist, Game
+from gamelist_tools.models.Gamelist import RawGamelist, Gamelist, Game, MediaIndex, GAME_FIELDS
+from gamelist_tools.models.GamelistTable import GamelistTable
+
+# Matches the XML declaration at the head of a gamelist file.
+XML_DECL_PATTERN = r"""<\?xml\s+version="(\d+\.\d+|\d*\.\d+)"\s*(?:encoding="[^"]*")?\s*\?>"""
+
+# When written gamelists are flushed to stable storage: after every file, once for a whole batch, or never.
+FSYNC_POLICIES = ('file', 'batch', 'none')
+
+# Compiled serializers by mapping, see get_serializer.
+SERIALIZERS: dict = {}
 
 
 def find_lists(directory: str) -> list:
@@ -92,8 +109,7 @@ def get_gamelist_data(path: str) -> RawGamelist:
 
     # Find the XML declaration at the head of the file so it doesn't have to be found later.
     index = 0
-    pattern = r"""<\?xml\s+version="(\d+\.\d+|\d*\.\d+)"\s*(?:encoding="[^"]*")?\s*\?>"""
-    match = re.match(pattern, raw.gamelist)
+    match = re.match(XML_DECL_PATTERN, raw.gamelist)
     if match:
       raw.xml_decl = match.group(0)
       index = match.end()
@@ -111,15 +127,200 @@ def get_gamelist_data(path: str) -> RawGamelist:
   return raw
 
 
-def output_gamelist(doc: str, path: Path) -> None:
+def get_gamelist_info(path: str) -> RawGamelist:
+  """
+  # Get Gamelist Info
+
+  Reads only the head of the gamelist file and returns a RawGamelist object containing the path, system and
+  XML declaration. The games themselves are not parsed, use ```iter_games``` to stream them.
+
+  ```python
+  get_gamelist_info(path: str) -> RawGamelist
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:------------------------------------|
+  | path            | str       | The path to the gamelist file.      |
+
+  """
+
+  raw = RawGamelist(path=path)
+
+  # Only the start of the file is needed to find the XML declaration.
+  with open(path, 'r') as f:
+    match = re.match(XML_DECL_PATTERN, f.read(1024))
+    if match:
+      raw.xml_decl = match.group(0)
+
+  # Get the best guess at the system name since most of the time the gamelist.xml is in a "system" directory.
+  parts = raw.path.split(os.sep)
+  raw.system = parts[next((i for i, x in enumerate(parts) if x == 'gamelist.xml'), None) - 1]
+
+  return raw
+
+
+def iter_game_elements(path: str, chunk_size: int = 65536) -> Iterator[ET.Element]:
+  """
+  # Iterate game elements
+
+  Stream the gamelist file and yield each ```<game>``` element as soon as it has been fully read. Elements are
+  detached from the tree once the caller moves on, so memory use does not grow with the size of the file.
+  Use the element before advancing the iterator, it is emptied afterwards.
+
+  ```python
+  iter_game_elements(path: str, chunk_size: int = 65536) -> Iterator[xml.etree.ElementTree.Element]
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:------------------------------------------------------|
+  | path            | str       | The path to the gamelist file.                        |
+  | chunk_size      | int       | Number of characters to read from the file at once.   |
+
+  """
+
+  # Gamelists can have more than one top level element (alternativeEmulator and gameList), so wrap them
+  # in a root node the same way get_gamelist_data does.
+  parser = ET.XMLPullParser(events=('start', 'end'))
+  parser.feed('<root>')
+  stack = []
+
+  def drain() -> Iterator[ET.Element]:
+    for event, element in parser.read_events():
+      if event == 'start':
+        stack.append(element)
+        continue
+
+      stack.pop()
+      if element.tag == 'game':
+        yield element
+
+      # Drop finished children of the gameList (and the top level nodes) so the tree never grows.
+      if 1 <= len(stack) <= 2:
+        element.clear()
+        stack[-1].remove(element)
+
+  with open(path, 'r') as f:
+    data = f.read(chunk_size)
+
+    # Skip the XML declaration since it can't appear inside the root node.
+    match = re.match(XML_DECL_PATTERN, data)
+    if match:
+      data = data[match.end():]
+
+    while data:
+      parser.feed(data)
+      yield from drain()
+      data = f.read(chunk_size)
+
+  parser.feed('</root>')
+  yield from drain()
+  parser.close()
+
+
+def get_element_text(element: ET.Element, tag: str) -> str:
+  """
+  # Get text from XML Element
+
+  Return the stripped text for the first child of an ElementTree element with a given tag.
+
+  ```python
+  get_element_text(element: xml.etree.ElementTree.Element, tag: str) -> str
+  ```
+
+  ## Properties
+
+  | Property        | Type                                | Description |
+  |:----------------|:------------------------------------|:------------------------------------------------------|
+  | element         | xml.etree.ElementTree.Element       | XML element to search the children of.                |
+  | tag             | str                                 | Tag of the child to return the text for.              |
+
+  """
+
+  child = element.find(tag)
+  return child.text.strip() if child is not None and child.text is not None else None
+
+
+def extract_fields(element: ET.Element, mapping: dict) -> dict:
+  """
+  # Extract fields from a game element
+
+  Walk the children of a ```<game>``` element once and return a dictionary of Game attribute -> value for every
+  mapped attribute, None when the tag is missing. Tags that are not in the mapping but match a Game attribute name
+  (```image```, ```md5```, ```crc32```, etc.) are kept as well. The first occurrence of a tag wins.
+
+  ```python
+  extract_fields(element: xml.etree.ElementTree.Element, mapping: dict) -> dict
+  ```
+
+  ## Properties
+
+  | Property        | Type                                | Description |
+  |:----------------|:------------------------------------|:------------------------------------------------------|
+  | element         | xml.etree.ElementTree.Element       | The game element to pull the values from.             |
+  | mapping         | dict                                | XML tag -> object attribute mapping (inverted map).   |
+
+  """
+
+  # Mapped tags that are missing from the element are left unset (None) rather than taking Game defaults.
+  values = dict.fromkeys(mapping.values())
+  found = set()
+
+  for child in element:
+    attr = mapping.get(child.tag)
+    if attr is None and child.tag in GAME_FIELDS:
+      attr = child.tag
+
+    if attr is None or attr in found:
+      continue
+
+    found.add(attr)
+    values[attr] = child.text.strip() if child.text is not None else None
+
+  # Genres are held as a list on the object.
+  if values.get('genres') is not None:
+    values['genres'] = values['genres'].split(',')
+
+  return values
+
+
+def iter_games(path: str, mapping: dict) -> Iterator[Game]:
+  """
+  # Iterate games in a gamelist file
+
+  Stream the gamelist file and yield a Game object for each ```<game>``` element, using the frontend's inverted
+  mapping to decide which attribute each tag populates.
+
+  ```python
+  iter_games(path: str, mapping: dict) -> Iterator[Game]
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:------------------------------------------------------|
+  | path            | str       | The path to the gamelist file.                        |
+  | mapping         | dict      | XML tag -> object attribute mapping (inverted map).   |
+
+  """
+
+  for raw_game in iter_game_elements(path):
+    values = extract_fields(raw_game, mapping)
+    yield Game(name=values.pop('name', None), path=values.pop('path', None), **values)
+
+
+def output_gamelist(doc: str, path: Path, fsync: str = 'file', pending: list = None) -> None:
   """
   # Output gamelist XML files
 
   Output the gamelist.xml file in XML format with proper indentation and encoding for all frontends.
-  The full directory structure is created as necessary.
+  The full directory structure is created as necessary. The file is replaced atomically, see ```atomic_write```.
 
   ```python
-  output_gamelist(doc: str, path: str) -> None
+  output_gamelist(doc: str, path: str, fsync: str = 'file', pending: list = None) -> None
   ```
 
   ## Properties
@@ -128,6 +329,8 @@ def output_gamelist(doc: str, path: Path) -> None:
   |:----------------|:----------|:-------------------------------------------------------------|
   | doc             | str.      | XML formatted string to write out to the gamelist.xml file.  |
   | path            | str       | The path to the gamelist file.                               |
+  | fsync           | str       | One of ```FSYNC_POLICIES```.                                 |
+  | pending         | list      | Batch to add the file to when fsync is 'batch'.              |
 
   """
 
@@ -136,10 +339,263 @@ def output_gamelist(doc: str, path: Path) -> None:
   os.makedirs(path, exist_ok=True)
 
   # Write the gamelist.xml file to the directory.
-  with open(f'{path.resolve()}/gamelist.xml', 'w') as file:
+  with atomic_write(f'{path.resolve()}/gamelist.xml', fsync, pending) as file:
     file.write(doc)
 
 
+def sync_directory(path: str) -> None:
+  """Flush a directory's entries (renames into it) to disk. Not possible on every platform, so errors are ignored."""
+  try:
+    fd = os.open(path, os.O_RDONLY)
+  except OSError:
+    return
+
+  try:
+    os.fsync(fd)
+  except OSError:
+    pass
+  finally:
+    os.close(fd)
+
+
+@contextmanager
+def atomic_write(filepath: str, fsync: str = 'file', pending: list = None, encoding: str = None) -> Iterator[TextIO]:
+  """
+  # Atomic write
+
+  Context manager that writes to a temporary file next to filepath and moves it over filepath with
+  ```os.replace``` once the block finishes, so readers only ever see the old file or the complete new one. If the
+  block raises, the temporary file is removed and filepath is left untouched.
+
+  With fsync 'file' the data and the rename are flushed to disk before returning. With fsync 'batch' the rename
+  is deferred by adding (temporary path, filepath) to pending, call ```commit_writes``` once the batch is done.
+  With fsync 'none' the file is renamed straight away and left to the operating system to flush.
+
+  ```python
+  with atomic_write(filepath, fsync='batch', pending=pending) as file:
+    file.write(doc)
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | filepath        | str       | The file to replace.                                            |
+  | fsync           | str       | One of ```FSYNC_POLICIES```.                                    |
+  | pending         | list      | Batch to add the file to when fsync is 'batch'.                 |
+  | encoding        | str       | Text encoding, the platform default if not given.               |
+
+  """
+
+  if fsync not in FSYNC_POLICIES:
+    raise ValueError(f'Unknown fsync policy: {fsync}')
+
+  # Without somewhere to queue the rename a batch of one is just a single file.
+  if fsync == 'batch' and pending is None:
+    fsync = 'file'
+
+  temp_path = f'{filepath}.tmp'
+  try:
+    with open(temp_path, 'w', encoding=encoding) as file:
+      yield file
+
+      if fsync == 'file':
+        file.flush()
+        os.fsync(file.fileno())
+  except BaseException:
+    if os.path.exists(temp_path):
+      os.remove(temp_path)
+    raise
+
+  if fsync == 'batch':
+    pending.append((temp_path, filepath))
+    return
+
+  os.replace(temp_path, filepath)
+  if fsync == 'file':
+    sync_directory(os.path.dirname(os.path.abspath(filepath)))
+
+
+def commit_writes(pending: list) -> int:
+  """
+  # Commit batched writes
+
+  Finish the writes queued by ```atomic_write``` with fsync 'batch'. All temporary files are flushed with a
+  single sync, moved into place, and the renames flushed with a second one, so a whole library costs two syncs
+  instead of two per system. Platforms without ```os.sync``` fall back to flushing each file. Returns the
+  number of files committed.
+
+  ```python
+  commit_writes(pending: list) -> int
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | pending         | list      | (temporary path, filepath) pairs queued by ```atomic_write```.  |
+
+  """
+
+  if not pending:
+    return 0
+
+  if hasattr(os, 'sync'):
+    os.sync()
+  else:
+    for temp_path, _ in pending:
+      with open(temp_path, 'rb+') as file:
+        os.fsync(file.fileno())
+
+  for temp_path, filepath in pending:
+    os.replace(temp_path, filepath)
+
+  if hasattr(os, 'sync'):
+    os.sync()
+  else:
+    for directory in {os.path.dirname(os.path.abspath(filepath)) for _, filepath in pending}:
+      sync_directory(directory)
+
+  committed = len(pending)
+  pending.clear()
+  return committed
+
+
+class DigestWriter:
+  """
+  # DigestWriter
+
+    ```python
+      DigestWriter(encoding: str = 'utf-8')
+    ```
+
+  File-like object that hashes and counts the bytes written to it instead of storing them, used to find out
+  what a document would look like on disk without writing it.
+
+  """
+
+  def __init__(self, encoding: str = 'utf-8'):
+    self.encoding = encoding
+    self.digest = hashlib.sha256()
+    self.size = 0
+
+
+  def write(self, text: str) -> int:
+    """Hash text as it would be written to a file opened in text mode."""
+    if os.linesep != '\n':
+      text = text.replace('\n', os.linesep)
+
+    data = text.encode(self.encoding)
+    self.digest.update(data)
+    self.size += len(data)
+    return len(text)
+
+
+  def writelines(self, lines: Iterator[str]) -> None:
+    """Hash each string in lines as if it was written."""
+    for line in lines:
+      self.write(line)
+
+
+def file_digest(path: str) -> tuple[int, str]:
+  """Return the (size, sha256 hex digest) of a file, (None, None) if it doesn't exist."""
+  try:
+    with open(path, 'rb') as f:
+      return (os.fstat(f.fileno()).st_size, hashlib.file_digest(f, 'sha256').hexdigest())
+  except FileNotFoundError:
+    return (None, None)
+
+
+def write_gamelist(
+  gamelist: Gamelist | GamelistTable,
+  mapping: dict,
+  path: Path,
+  rootElement: str = 'gameList',
+  fsync: str = 'file',
+  pending: list = None,
+) -> str:
+  """
+  # Write gamelist XML file
+
+  Stream the gamelist.xml file for a Gamelist object straight to disk without holding the document in memory.
+  The full directory structure is created as necessary. If the file on disk already holds exactly the document
+  that would be written it is left untouched, so unchanged systems cost no writes. Changed files are replaced
+  atomically, see ```atomic_write``` for the fsync policies. Returns 'written' or 'skipped'.
+
+  ```python
+  write_gamelist(gamelist, mapping, path, rootElement='gameList', fsync='file', pending=None) -> str
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | gamelist        | Gamelist  | Gamelist object that holds all the data for the gameList.xml.   |
+  | mapping         | dict      | Dictionary containing object -> XML tag mapping (inverted map)  |
+  | path            | Path      | The directory to write the gamelist file to.                    |
+  | rootElement     | str       | Tag name for the document's root element.                       |
+  | fsync           | str       | One of ```FSYNC_POLICIES```.                                    |
+  | pending         | list      | Batch to add the file to when fsync is 'batch'.                 |
+
+  """
+
+  filepath = os.path.join(path, 'gamelist.xml')
+
+  # Hash the new document first, generating it is much cheaper than rewriting a file on flash or a NAS.
+  size, digest = file_digest(filepath)
+  if size is not None:
+    new = DigestWriter()
+    write_xml(gamelist, mapping, new, rootElement)
+
+    if new.size == size and new.digest.hexdigest() == digest:
+      return 'skipped'
+
+  os.makedirs(path, exist_ok=True)
+
+  with atomic_write(filepath, fsync, pending, encoding='utf-8') as file:
+    write_xml(gamelist, mapping, file, rootElement)
+
+  return 'written'
+
+
+def prune_gamelists(output: str, systems: list[str]) -> int:
+  """
+  # Prune gamelist XML files
+
+  Remove the gamelist.xml files of system directories in the output that are not in the list of systems, for
+  systems that have been removed from the library. Only the gamelist.xml files are removed, media and other
+  files are left alone. Returns the number of files removed.
+
+  ```python
+  prune_gamelists(output: str, systems: list[str]) -> int
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | output          | str       | Output root containing a directory per system.                  |
+  | systems         | list[str] | Systems that are still in the library.                          |
+
+  """
+
+  keep = set(systems)
+  removed = 0
+
+  try:
+    entries = list(os.scandir(output))
+  except FileNotFoundError:
+    return 0
+
+  for entry in entries:
+    filepath = os.path.join(entry.path, 'gamelist.xml')
+    if entry.is_dir() and entry.name not in keep and os.path.isfile(filepath):
+      os.remove(filepath)
+      removed += 1
+
+  return removed
+
+
 def parse_value(value_type: str, value: str) -> (bool | int | str):
   """
   # Parse XML values
@@ -218,6 +674,73 @@ def find_files(name: str, path: str) -> list[str]:
   return [str(f) for f in Path(path).rglob(name + '*') if f.is_file()]
 
 
+def media_stem(path: str) -> str:
+  """
+  # Media stem
+
+  Return the normalized file name (no directory or extension) used to match games to media files.
+
+  ```python
+  media_stem(path: str) -> str
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------|
+  | path            | str       | Path or file name to normalize.             |
+
+  """
+
+  return os.path.splitext(os.path.basename(path))[0].strip()
+
+
+def build_media_index(path: str) -> MediaIndex:
+  """
+  # Build media index for a system media directory
+
+  Walk the media directory once with ```os.scandir``` and index every file by its normalized stem and
+  the directory (media category) it was found in. Missing directories produce an empty index.
+
+  Games are matched to media by their exact stem. The ```find_files``` glob this replaced matched by prefix,
+  so a game also picked up media named for a longer title (```Castle (Europe) (Beta).mp4``` for
+  ```Castle (Europe)```).
+
+  ```python
+  build_media_index(path: str) -> MediaIndex
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------|
+  | path            | str       | The path to the system's media directory.   |
+
+  """
+
+  index = MediaIndex(path=path)
+  pending = [path]
+
+  while pending:
+    directory = pending.pop()
+
+    try:
+      with os.scandir(directory) as entries:
+        # Sort so the file picked for a name is the same on every run.
+        entries = sorted(entries, key=lambda entry: entry.name)
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+      continue
+
+    category = os.path.basename(directory)
+    for entry in entries:
+      if entry.is_dir():
+        pending.append(entry.path)
+      elif entry.is_file():
+        index.add(media_stem(entry.name), category, entry.path)
+
+  return index
+
+
 def enclosing_directory(path: str):
   """
   # Return Enclosing directory for a file system object.
@@ -269,11 +792,153 @@ def get_rel_path(path: str, depth: int) -> str:
   )
 
 
-def gen_xml(gamelist: Gamelist, mapping: dict, rootElement: str = 'gameList') -> str:
+def escape_text(value: str) -> str:
+  """
+  # Escape XML text
+
+  Escape a string for use as XML element text the same way ```xml.dom.minidom``` does.
+
+  ```python
+  escape_text(value: str) -> str
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:--------------------------------------------|
+  | value           | str       | Text to escape.                             |
+
+  """
+
+  if '&' in value:
+    value = value.replace('&', '&amp;')
+  if '<' in value:
+    value = value.replace('<', '&lt;')
+  if '>' in value:
+    value = value.replace('>', '&gt;')
+
+  return value
+
+
+class GameSerializer:
+  """
+  # GameSerializer
+
+    ```python
+      GameSerializer(mapping: dict)
+    ```
+
+  A frontend mapping compiled for writing ```<game>``` blocks. The mapped attributes are fetched with a single
+  ```operator.attrgetter``` call per game and the opening and closing tags are built once up front, so writing
+  a game only has to escape the values that are set. Mapped names that aren't Game attributes are dropped since
+  they can never have a value. Use ```get_serializer``` to share one per mapping.
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | mapping         | dict      | Dictionary containing object -> XML tag mapping (inverted map)  |
+
+  """
+
+  __slots__ = ('attrs', 'tags', 'values')
+
+  def __init__(self, mapping: dict):
+    self.attrs = tuple(attr for attr in mapping if attr in GAME_FIELDS)
+    self.tags = tuple((f'\t\t<{mapping[attr]}>', f'</{mapping[attr]}>\n') for attr in self.attrs)
+
+    # attrgetter hands back a bare value rather than a tuple for a single attribute.
+    if len(self.attrs) == 1:
+      getter = attrgetter(self.attrs[0])
+      self.values = lambda game: (getter(game),)
+    elif self.attrs:
+      self.values = attrgetter(*self.attrs)
+    else:
+      self.values = lambda game: ()
+
+
+  def __call__(self, row: tuple) -> str:
+    """Return the ```<game>``` block for a tuple of values in ```attrs``` order."""
+    children = []
+
+    for (open_tag, close_tag), value in zip(self.tags, row):
+      if value is None:
+        continue
+
+      # Nearly every value is already a string, only convert the ones that aren't.
+      if type(value) is not str:
+        value = ', '.join(value) if isinstance(value, list) else str(value)
+
+      children.append(f'{open_tag}{escape_text(value)}{close_tag}')
+
+    if children:
+      return f'\t<game>\n{"".join(children)}\t</game>\n'
+
+    return '\t<game/>\n'
+
+
+def get_serializer(mapping: dict) -> GameSerializer:
+  """Return the compiled GameSerializer for a mapping, compiling it the first time the mapping is seen."""
+  key = tuple(mapping.items())
+
+  serializer = SERIALIZERS.get(key)
+  if serializer is None:
+    serializer = SERIALIZERS[key] = GameSerializer(mapping)
+
+  return serializer
+
+
+def write_xml(
+  gamelist: Gamelist | GamelistTable, mapping: dict, file: TextIO, rootElement: str = 'gameList'
+) -> None:
+  """
+  # Write XML
+
+  Stream the XML document for the Gamelist object to an open file, one ```<game>``` block at a time, using a
+  mapping dictionary for tag names. The output is the same as ```toprettyxml(indent='\\t', newl='\\n')``` on
+  the equivalent minidom document without building the document in memory.
+
+  ```python
+  write_xml(gamelist, mapping, file, rootElement) -> None
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | gamelist        | Gamelist  | Gamelist (or GamelistTable) that holds the gameList.xml data.   |
+  | mapping         | dict      | Dictionary containing object -> XML tag mapping (inverted map)  |
+  | file            | TextIO    | Open text file (or buffer) to write the document to.            |
+  | rootElement     | str       | Tag name for the document's root element.                       |
+
+  """
+
+  file.write('<?xml version="1.0" ?>\n')
+
+  # An element with no children is written as a self closing tag.
+  if not len(gamelist):
+    file.write(f'<{rootElement}/>\n')
+    return
+
+  file.write(f'<{rootElement}>\n')
+
+  # Pull the mapped values for each game, straight from the columns when given a GamelistTable.
+  serializer = get_serializer(mapping)
+  if isinstance(gamelist, GamelistTable):
+    rows = gamelist.iter_rows(serializer.attrs)
+  else:
+    rows = map(serializer.values, gamelist.games)
+
+  file.writelines(map(serializer, rows))
+  file.write(f'</{rootElement}>\n')
+
+
+def gen_xml(gamelist: Gamelist | GamelistTable, mapping: dict, rootElement: str = 'gameList') -> str:
   """
   # Generate XML
 
   Generate the XML document string for the Gamelist object using a mapping dictionary for tag names.
+  Use ```write_xml``` or ```write_gamelist``` to stream the document to a file instead.
 
   ```python
   gen_xml(gamelist, mapping) -> str
@@ -288,58 +953,51 @@ def gen_xml(gamelist: Gamelist, mapping: dict, rootElement: str = 'gameList') ->
 
   """
 
-  # Create the gamelist root node.
-  doc = XML.Document()
-  root = doc.createElement(rootElement)
-  doc.appendChild(root)
+  doc = io.StringIO()
+  write_xml(gamelist, mapping, doc, rootElement)
 
-  # Process all games in the gamelist.
-  for game in gamelist.games:
-    # Create the "game" child node under the gamelist.
-    child = doc.createElement('game')
+  # Pass back the pretty XML document string.
+  return doc.getvalue()
 
-    # Go thorugh the mappoing dictionary passed to know what and how to populate the children.
-    for attr, tag in mapping.items():
-      value = getattr(game, attr, None)
 
-      # Only need to build the element/node if there is actually a value.
-      if value is not None:
-        # Convert lists to string
-        if isinstance(value, list):
-          value = ', '.join(value)
+def normalize_extensions(extension: str | Iterable[str] = None) -> frozenset:
+  """Return a set of lower case extensions with a leading dot, None for no filtering."""
+  if extension is None:
+    return None
 
-        # Build the child text node and append to the element
-        child_element = doc.createElement(tag)
-        child_element.appendChild(doc.createTextNode(str(value)))
-        child.appendChild(child_element)
+  if isinstance(extension, str):
+    extension = [extension]
 
-    root.appendChild(child)
+  return frozenset(ext.lower() if ext.startswith('.') else f'.{ext.lower()}' for ext in extension)
 
-  # Pass back the pretty XML document string.
-  return doc.toprettyxml(indent='\t', newl='\n')
 
-
-def gen_dir_gamelist(path: str, extension: str = None) -> Gamelist:
+def gen_dir_gamelist(path: str, extension: str | Iterable[str] = None, recursive: bool = False) -> Gamelist:
   """
   # Generate Gamelist for games in directory
 
   Generate XML Gamelist for directory. Filter by extension if needed. Useful if scraping a directory
   for games to then populate media or metadata to output a gamelist.xml.
 
+  Entries come from ```os.scandir``` so file types are known without a stat per entry, which matters on network
+  mounts. Extensions are matched case insensitively. With ```recursive``` subfolders are searched too (hidden
+  ones are skipped) and a folder whose name has one of the extensions, such as ES-DE's ```Game.m3u``` disc
+  folders, is listed as a game instead of being searched.
+
   ```python
-  gen_dir_gamelist(path, ext) -> Gamelist
+  gen_dir_gamelist(path, extension=None, recursive=False) -> Gamelist
   ```
 
   ## Properties
 
-  | Property        | Type      | Description |
-  |:----------------|:----------|:----------------------------------------------------------------|
-  | path            | str       | String path to directory to to build gamelist off of.           |
-  | extension       | str       | File extension to limit build to.                               |
+  | Property        | Type          | Description |
+  |:----------------|:--------------|:----------------------------------------------------------------|
+  | path            | str           | String path to directory to to build gamelist off of.           |
+  | extension       | str, set[str] | File extension(s) to limit build to.                            |
+  | recursive       | bool          | Include games in subfolders.                                    |
 
   """
 
-  game_folder = Path(path)
+  extensions = normalize_extensions(extension)
 
   gamelist = Gamelist(
     path=path,
@@ -347,15 +1005,68 @@ def gen_dir_gamelist(path: str, extension: str = None) -> Gamelist:
     xml_decl='<?xml version="1.0"?>'
   )
 
-  # Process files in directory and build games from them for the gamelist.
-  for file in game_folder.iterdir():
-    if file.is_file() and (extension is None or file.suffix == extension):
-      game = Game(
-        # TODO: Modify how we generate the name and drop articles in brackets and parentheses at the end of the name.
-        name=os.path.splitext(os.path.basename(file))[0],
-        path=f'./{get_rel_path(file, 1)}'
-      )
-
-      gamelist.games.append(game)
+  # Directories still to be read, with their path relative to the system folder.
+  pending = [(path, '')]
+
+  while pending:
+    directory, relative = pending.pop()
+
+    with os.scandir(directory) as entries:
+      for entry in entries:
+        name, suffix = os.path.splitext(entry.name)
+        matched = extensions is None or suffix.lower() in extensions
+
+        if entry.is_file():
+          if not matched:
+            continue
+        elif entry.is_dir():
+          # A folder with a game extension is a game (multi-disc and PC games), any other folder may hold games.
+          if extensions is None or not matched:
+            if recursive and not entry.name.startswith('.'):
+              pending.append((entry.path, os.path.join(relative, entry.name)))
+            continue
+        else:
+          continue
+
+        game = Game(
+          # TODO: Modify how we generate the name and drop articles in brackets and parentheses at the end of the name.
+          name=name,
+          path=f'.{os.sep}{os.path.join(relative, entry.name)}'
+        )
+
+        gamelist.append(game)
 
   return gamelist
+
+
+def gen_dir_gamelists(
+  path: str, extension: str | Iterable[str] = None, recursive: bool = False, workers: int = 8
+) -> list[Gamelist]:
+  """
+  # Generate Gamelists for a ROM directory
+
+  Generate a Gamelist for every system folder in a ROM directory with ```gen_dir_gamelist```, reading the system
+  folders concurrently since the work is mostly waiting on the filesystem. Folders with no games are left out.
+  Gamelists are returned in system order.
+
+  ```python
+  gen_dir_gamelists(path, extension=None, recursive=False, workers=8) -> list[Gamelist]
+  ```
+
+  ## Properties
+
+  | Property        | Type          | Description |
+  |:----------------|:--------------|:----------------------------------------------------------------|
+  | path            | str           | The ROM directory containing a folder per system.               |
+  | extension       | str, set[str] | File extension(s) to limit build to.                            |
+  | recursive       | bool          | Include games in subfolders.                                    |
+  | workers         | int           | Number of threads reading system folders.                       |
+
+  """
+
+  with os.scandir(path) as entries:
+    systems = sorted(entry.path for entry in entries if entry.is_dir() and not entry.name.startswith('.'))
+
+  with ThreadPoolExecutor(max_workers=workers) as executor:
+    gamelists = executor.map(lambda system: gen_dir_gamelist(system, extension, recursive), systems)
+    return [gamelist for gamelist in gamelists if gamelist.games]
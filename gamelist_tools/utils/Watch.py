@@ -0,0 +1,437 @@
+#! /usr/bin/env python3
+"""
+ Program: Watch an ES-DE directory and regenerate only the systems that change.
+    Name: Andrew Dixon            File: Watch.py
+    Date: 17 Oct 2026
+   Notes: Uses inotify on Linux, other platforms (and filesystems without inotify, like most network mounts)
+          fall back to polling the gamelist files and media directory mtimes.
+
+    Copyright (C) 2025  Andrew Dixon
+
+    This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+    warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with this program.
+    If not, see <https://www.gnu.org/licenses/>.
+
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+import os
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+from typing import Callable
+from gamelist_tools.models.Gamelist import Gamelist
+from gamelist_tools.utils.Cache import media_fingerprint
+from gamelist_tools.utils.ESDE import get_media_directory, get_rom_directory, get_system_gamelist
+from gamelist_tools.utils.Export import Target, export_gamelists
+from gamelist_tools.utils.Hashing import hash_roms
+from gamelist_tools.utils.MediaSync import sync_media, dedupe_media
+
+# inotify event flags, from <sys/inotify.h>.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# Gamelists are caught when they are finished being written, media when a file appears or disappears.
+GAMELIST_EVENTS = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+MEDIA_EVENTS = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# Header of each event read from an inotify file descriptor: wd, mask, cookie, name length.
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+  """
+  # InotifyWatcher
+
+    ```python
+      InotifyWatcher(gamelist_directory: str, media_directory: str)
+    ```
+
+  Report which systems changed using inotify watches on every system's gamelist directory and every directory in
+  its media tree. New system and media directories are watched as they are created. Raises OSError where
+  inotify is not available.
+
+  ## Properties
+
+  | Property            | Type      | Description |
+  |:--------------------|:----------|:------------------------------------------------|
+  | gamelist_directory  | str       | The ES-DE gamelists directory.                  |
+  | media_directory     | str       | The ES-DE downloaded_media directory.           |
+
+  """
+
+  def __init__(self, gamelist_directory: str, media_directory: str):
+    libc_name = ctypes.util.find_library('c')
+    self.libc = ctypes.CDLL(libc_name, use_errno=True) if libc_name else None
+    if self.libc is None or not hasattr(self.libc, 'inotify_init1'):
+      raise OSError('inotify is not available on this platform')
+
+    self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if self.fd < 0:
+      raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+    # Watch descriptor -> (directory, system or None for the top level directories, is a gamelist directory).
+    self.watches = {}
+    self.systems = set()
+
+    self.add(gamelist_directory, None, True)
+    self.add(media_directory, None, False)
+
+
+  def add(self, path: str, system: str, gamelists: bool) -> None:
+    """Watch a directory, and for media every directory below it."""
+    mask = GAMELIST_EVENTS if gamelists else MEDIA_EVENTS
+    wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+    if wd < 0:
+      return
+
+    self.watches[wd] = (path, system, gamelists)
+    if system:
+      self.systems.add(system)
+
+    try:
+      with os.scandir(path) as entries:
+        directories = [entry for entry in entries if entry.is_dir()]
+    except OSError:
+      return
+
+    # The top level directories hold a directory per system, media directories go all the way down.
+    for entry in directories:
+      if system is None:
+        self.add(entry.path, entry.name, gamelists)
+      elif not gamelists:
+        self.add(entry.path, system, gamelists)
+
+
+  def changes(self, timeout: float) -> set[str]:
+    """Wait up to timeout seconds for events and return the systems they touched."""
+    ready, _, _ = select.select([self.fd], [], [], timeout)
+    if not ready:
+      return set()
+
+    try:
+      data = os.read(self.fd, 65536)
+    except BlockingIOError:
+      return set()
+
+    changed = set()
+    offset = 0
+    while offset < len(data):
+      wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+      name = os.fsdecode(data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0'))
+      offset += EVENT_HEADER.size + length
+
+      # Events were dropped, so anything could have changed.
+      if mask & IN_Q_OVERFLOW:
+        changed |= self.systems
+        continue
+
+      if mask & IN_IGNORED:
+        self.watches.pop(wd, None)
+        continue
+
+      if wd not in self.watches:
+        continue
+
+      path, system, gamelists = self.watches[wd]
+
+      # The top level directories only hold system directories, anything else in them is ignored.
+      if system is None:
+        if not mask & IN_ISDIR:
+          continue
+        system = name
+
+      # Only the gamelist file matters in a system's gamelist directory.
+      elif gamelists and name != 'gamelist.xml':
+        continue
+
+      # Watch directories as they are created so their contents are picked up too.
+      if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+        self.add(os.path.join(path, name), system, gamelists)
+
+      changed.add(system)
+
+    return changed
+
+
+  def close(self) -> None:
+    """Stop watching."""
+    os.close(self.fd)
+
+
+class PollingWatcher:
+  """
+  # PollingWatcher
+
+    ```python
+      PollingWatcher(gamelist_directory: str, media_directory: str)
+    ```
+
+  Report which systems changed by comparing each system's gamelist file size and mtime and media directory
+  mtimes (see ```Cache.media_fingerprint```) between checks.
+
+  ## Properties
+
+  | Property            | Type      | Description |
+  |:--------------------|:----------|:------------------------------------------------|
+  | gamelist_directory  | str       | The ES-DE gamelists directory.                  |
+  | media_directory     | str       | The ES-DE downloaded_media directory.           |
+
+  """
+
+  def __init__(self, gamelist_directory: str, media_directory: str):
+    self.gamelist_directory = gamelist_directory
+    self.media_directory = media_directory
+    self.states = self.snapshot()
+
+
+  def snapshot(self) -> dict:
+    """Return system -> (gamelist size, gamelist mtime, media fingerprint) for every system on disk."""
+    systems = set()
+    for directory in (self.gamelist_directory, self.media_directory):
+      try:
+        with os.scandir(directory) as entries:
+          systems.update(entry.name for entry in entries if entry.is_dir())
+      except OSError:
+        continue
+
+    states = {}
+    for system in systems:
+      try:
+        stat = os.stat(os.path.join(self.gamelist_directory, system, 'gamelist.xml'))
+        state = (stat.st_size, stat.st_mtime_ns)
+      except OSError:
+        state = (None, None)
+
+      states[system] = (*state, media_fingerprint(os.path.join(self.media_directory, system)))
+
+    return states
+
+
+  def changes(self, timeout: float) -> set[str]:
+    """Wait timeout seconds and return the systems whose state is different from the last check."""
+    time.sleep(timeout)
+
+    states = self.snapshot()
+    changed = {
+      system for system in states.keys() | self.states.keys() if states.get(system) != self.states.get(system)
+    }
+    self.states = states
+
+    return changed
+
+
+  def close(self) -> None:
+    """Stop watching."""
+
+
+def open_watcher(esde_path: str, polling: bool = False) -> InotifyWatcher | PollingWatcher:
+  """Return an inotify watcher for an ES-DE directory, or a polling one if asked for or inotify isn't available."""
+  gamelist_directory = os.path.join(esde_path, 'gamelists')
+  media_directory = get_media_directory(esde_path)
+
+  if not polling:
+    try:
+      return InotifyWatcher(gamelist_directory, media_directory)
+    except OSError:
+      pass
+
+  return PollingWatcher(gamelist_directory, media_directory)
+
+
+def watch(
+  esde_path: str,
+  callback: Callable[[set[str]], None],
+  debounce: float = 0.25,
+  interval: float = 1.0,
+  polling: bool = False,
+  stop: threading.Event = None,
+) -> None:
+  """
+  # Watch ES-DE directory
+
+  Call callback with the set of changed systems whenever gamelists or media change under an ES-DE directory.
+  Events are collected until none have arrived for ```debounce``` seconds, so a scrape writing a dozen files
+  for a game is handled once. Runs until ```stop``` is set.
+
+  ```python
+  watch(esde_path, callback, debounce=0.25, interval=1.0, polling=False, stop=None) -> None
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | esde_path       | str       | The path to the ES-DE user directory.                           |
+  | callback        | Callable  | Called with the set of changed system names.                    |
+  | debounce        | float     | Seconds without events before the changes are handled.          |
+  | interval        | float     | Seconds between checks while idle (and between polls).          |
+  | polling         | bool      | Poll the filesystem even when inotify is available.             |
+  | stop            | Event     | Set to stop watching.                                           |
+
+  """
+
+  watcher = open_watcher(esde_path, polling)
+
+  try:
+    while not (stop and stop.is_set()):
+      changed = watcher.changes(interval)
+      if not changed:
+        continue
+
+      # Keep collecting until the burst of events is over.
+      while more := watcher.changes(debounce):
+        changed |= more
+
+      callback(changed)
+  finally:
+    watcher.close()
+
+
+def refresh_systems(esde_path: str, library: dict, systems: set[str]) -> tuple[list[Gamelist], list[str]]:
+  """
+  # Refresh systems
+
+  Reparse the gamelists for the given systems and update them in the library dictionary of system -> Gamelist.
+  Systems whose gamelist no longer exists are removed. Returns the (updated gamelists, removed systems).
+
+  ```python
+  refresh_systems(esde_path: str, library: dict, systems: set[str]) -> tuple[list[Gamelist], list[str]]
+  ```
+
+  ## Properties
+
+  | Property        | Type      | Description |
+  |:----------------|:----------|:----------------------------------------------------------------|
+  | esde_path       | str       | The path to the ES-DE user directory.                           |
+  | library         | dict      | System -> Gamelist, updated in place.                           |
+  | systems         | set[str]  | Systems to reparse.                                             |
+
+  """
+
+  media_directory = get_media_directory(esde_path)
+  updated = []
+  removed = []
+
+  for system in sorted(systems):
+    path = os.path.join(esde_path, 'gamelists', system, 'gamelist.xml')
+
+    if not os.path.isfile(path):
+      if library.pop(system, None) is not None:
+        removed.append(system)
+      continue
+
+    try:
+      gamelist = get_system_gamelist(path, media_directory)
+    except Exception as e: #noqa E722 Do not use bare except:
+      # Most likely caught mid write, the next event for the file will pick it up.
+      print(f'An error occurred while processing the {system} gamelist: {e}')
+      continue
+
+    gamelist.sort()
+    library[system] = gamelist
+    updated.append(gamelist)
+
+  return updated, removed
+
+
+def watch_library(
+  esde_path: str,
+  gamelists: list[Gamelist],
+  targets: list[Target],
+  fsync: str = 'batch',
+  media: str = None,
+  debounce: float = 0.25,
+  interval: float = 1.0,
+  polling: bool = False,
+  stop: threading.Event = None,
+  hashes: bool = False,
+  hash_cache: str = None,
+  dedupe: bool = False,
+  workers: int = None,
+) -> None:
+  """
+  # Watch library
+
+  Keep an imported library in memory and, as gamelists or media change, reparse only the affected systems and
+  write them for every target. Removed systems have their output gamelists removed. Runs until ```stop``` is
+  set. Pass the same hash and dedupe settings as the initial import so regenerated systems keep them.
+
+  ```python
+  watch_library(esde_path, gamelists, targets, fsync='batch', media=None, debounce=0.25, interval=1.0, polling=False)
+  ```
+
+  ## Properties
+
+  | Property        | Type            | Description |
+  |:----------------|:----------------|:----------------------------------------------------------------|
+  | esde_path       | str             | The path to the ES-DE user directory.                           |
+  | gamelists       | list[Gamelist]  | The library already imported with ```parse_gamelist_data```.    |
+  | targets         | list[Target]    | Frontends to write changed systems for.                         |
+  | fsync           | str             | One of ```FSYNC_POLICIES```.                                    |
+  | media           | str             | Media sync mode for changed systems, see ```sync_media```.      |
+  | debounce        | float           | Seconds without events before the changes are handled.          |
+  | interval        | float           | Seconds between checks while idle (and between polls).          |
+  | polling         | bool            | Poll the filesystem even when inotify is available.             |
+  | stop            | Event           | Set to stop watching.                                           |
+  | hashes          | bool            | Hash ROM files of changed systems to populate md5 and crc32.    |
+  | hash_cache      | str             | Path to the ROM hash cache file.                                |
+  | dedupe          | bool            | Deduplicate media of changed systems before syncing it.         |
+  | workers         | int             | Number of threads hashing and syncing files.                    |
+
+  """
+
+  library = {gamelist.system: gamelist for gamelist in gamelists}
+
+  def regenerate(systems: set[str]) -> None:
+    start = time.perf_counter()
+    updated, removed = refresh_systems(esde_path, library, systems)
+
+    if hashes and updated:
+      hash_roms(updated, get_rom_directory(esde_path), workers or 4, hash_cache)
+
+    if media:
+      duplicates = dedupe_media(updated, workers=workers or 8) if dedupe else None
+
+      for target in targets:
+        if target.media and target.rel_paths:
+          sync_media(
+            updated,
+            target.output,
+            media,
+            workers=workers or 8,
+            depth=target.depth,
+            prepend=target.prepend,
+            exclude=target.exclude,
+            duplicates=duplicates,
+          )
+
+    results = export_gamelists(updated, targets, fsync=fsync)
+
+    for target in targets:
+      for system in removed:
+        filepath = os.path.join(target.output, system, 'gamelist.xml')
+        if os.path.isfile(filepath):
+          os.remove(filepath)
+
+    systems = ', '.join(gamelist.system for gamelist in updated) or 'nothing'
+    if removed:
+      systems += f' (removed {", ".join(removed)})'
+
+    print(f'[+] Regenerated {systems}: {results} in {time.perf_counter() - start:.3f} seconds')
+
+  watch(esde_path, regenerate, debounce, interval, polling, stop)
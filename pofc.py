@@ -21,14 +21,13 @@
 # TODO: Write a pofc script to build gamelist from a directory and scan for images in dir to add to image on the list.
 
 import os
-import traceback
 import argparse
 import time
-from pathlib import Path
 from gamelist_tools import ESDE
-# from gamelist_tools import Batocera
-from gamelist_tools import EmulationStation
-from gamelist_tools.utils.Ubiquitous import gen_xml, output_gamelist
+from gamelist_tools.utils.Ubiquitous import prune_gamelists, FSYNC_POLICIES
+from gamelist_tools.utils.Export import TARGETS, make_target, export_gamelists
+from gamelist_tools.utils.MediaSync import sync_media, dedupe_media
+from gamelist_tools.utils.Watch import watch_library
 
 
 # PATH: str = ''
@@ -36,69 +35,104 @@ from gamelist_tools.utils.Ubiquitous import gen_xml, output_gamelist
 GAMELIST_DATA: list = []
 
 
-def main(path: str, output: str) -> None:
+def main(
+  path: str,
+  output: str,
+  workers: int = None,
+  cache: str = None,
+  hashes: bool = False,
+  hash_cache: str = None,
+  media: str = None,
+  dedupe: bool = False,
+  prune: bool = False,
+  fsync: str = 'batch',
+  targets: list[str] = None,
+  watch: bool = False,
+  polling: bool = False,
+) -> None:
   """
   Main
   """
   global GAMELIST_DATA
+  targets = targets or ['emulationstation']
 
   start_time = time.perf_counter()
   print('\n[+] Starting gamelist processing...\n[+] Importing ES-DE game collection data...')
-  GAMELIST_DATA = ESDE.parse_gamelist_data(path)
+  GAMELIST_DATA = ESDE.parse_gamelist_data(
+    path, workers=workers, cache=cache, hashes=hashes, hash_cache=hash_cache
+  )
   end_time = time.perf_counter()
 
   # Sort the gamelists
   GAMELIST_DATA = sorted(GAMELIST_DATA)
 
-  # Process all gamelists and output them to a directory.
+  # Each target gets its own output root when there is more than one.
+  outputs = {name: output if len(targets) == 1 else os.path.join(output, name) for name in targets}
+  output_targets = [make_target(name, outputs[name]) for name in targets]
+
+  # Put the media in the output tree while the games still point at the source files.
+  if media:
+    duplicates = None
+    if dedupe:
+      print('[+] Finding duplicate media...')
+      duplicates = dedupe_media(GAMELIST_DATA, workers=workers or 8)
+
+    for target in output_targets:
+      if not (target.media and target.rel_paths):
+        continue
+
+      print(f'[+] Syncing media to {target.name} output ({media})...')
+      counts = sync_media(
+        GAMELIST_DATA,
+        target.output,
+        mode=media,
+        workers=workers or 8,
+        depth=target.depth,
+        prepend=target.prepend,
+        exclude=target.exclude,
+        duplicates=duplicates,
+      )
+      print(f'[+] Media files: {counts}\n')
+
+  # Sort the games in each gamelist once, every target is written in the same order.
   for gl in GAMELIST_DATA:
-    try:
-
-      # Sort the games in the gamelist.
-      gl.sort()
-
-      # Set relative paths and prefix with a "images" directory.
-      gl.set_rel_paths(prepend='images')
-
-      print(f'------ {gl.system} - # Games: {len(gl.games)} ------')
-
-      # Move images around on the object to set what we want showing up for other tags.
-      for i, game in enumerate(gl.games):
-
-        if not game.image:
-          game.image = game.miximage if game.miximage else game.thumbnail
-          # game.image = game.thumbnail if game.thumbnail else game.titleshot
-
-        if not game.thumbnail:
-          game.thumbnail = game.boxfront
+    gl.sort()
+    print(f'------ {gl.system} - # Games: {len(gl.games)} ------')
 
-        # Update the game object after changes are made.
-        gl.games[i] = game
+  # Serialize the library for every target from the one import.
+  print(f'\n[+] XML Generation for: {", ".join(targets)}')
+  results = export_gamelists(GAMELIST_DATA, output_targets, workers=workers, fsync=fsync)
 
-      print(f'XML Generation: for {gl.system}\n')
-      # Batocera_mapping = Batocera.return_mapping()
-      EmulationStation_mapping = EmulationStation.return_mapping(invert=True)
+  for name, written in results.items():
+    # Clear out gamelists for systems that are no longer in the library.
+    removed = prune_gamelists(outputs[name], [gl.system for gl in GAMELIST_DATA]) if prune else 0
 
-      # doc = gen_xml(gl, Batocera_mapping)
-      doc = gen_xml(gl, EmulationStation_mapping)
-      # print(xml_str)
-
-      # REGEX to match .chd in gamelist for converting to .m3u on sd cards.
-      #  <path>\.\/.*\(Disc 1\)\.chd<\/path>
-
-      # Generate what the output directory needs to be based off system name and generate the gamelist.
-      output_dir = Path(f'{output}{gl.system}')
-      output_gamelist(doc, output_dir)
-
-    except Exception as e: #noqa E722 Do not use bare except:
-      print(f'Error processing :: {gl.system} :: gamelist!')
-      print(f"Error Type: {type(e).__name__}")
-      print(f"Error Value: {e}")
-      print("\n--- Full Traceback ---")
-      print(traceback.format_exc())
+    print(
+      f'[+] {name} gamelists written: {written.get("written", 0)}, skipped (unchanged): {written.get("skipped", 0)}, '
+      f'failed: {written.get("failed", 0)}, removed: {removed}'
+    )
 
   print(f'Gamelist file processing time: {end_time - start_time} seconds\n')
 
+  # Keep the library in memory and regenerate systems as they change.
+  if watch:
+    print('[+] Watching for changes, press Ctrl+C to stop...')
+    try:
+      watch_library(
+        path,
+        GAMELIST_DATA,
+        output_targets,
+        fsync=fsync,
+        media=media,
+        polling=polling,
+        hashes=hashes,
+        hash_cache=hash_cache,
+        dedupe=dedupe,
+        workers=workers,
+      )
+    except KeyboardInterrupt:
+      print('\n[+] Stopped watching.')
+
 
 # If the pofc.py is run (instead of imported as a module),
 # call the main() function:
@@ -121,8 +155,109 @@ if __name__ == '__main__':
     help='Specify the output directory for the processed gamelist files.',
   )
 
+  parser.add_argument(
+    '--workers',
+    '-w',
+    type=int,
+    default=None,
+    required=False,
+    help='Number of processes to import systems with in parallel.',
+  )
+
+  parser.add_argument(
+    '--cache',
+    '-c',
+    default=None,
+    required=False,
+    help='Specify a cache file so only systems that changed since the last run are imported again.',
+  )
+
+  parser.add_argument(
+    '--hash',
+    action='store_true',
+    required=False,
+    help='Hash ROM files to populate md5 and crc32.',
+  )
+
+  parser.add_argument(
+    '--hash-cache',
+    default=None,
+    required=False,
+    help='Specify a cache file for ROM hashes so unchanged ROMs are not hashed again.',
+  )
+
+  parser.add_argument(
+    '--sync-media',
+    nargs='?',
+    const='auto',
+    default=None,
+    choices=['auto', 'hardlink', 'reflink', 'copy'],
+    required=False,
+    help='Copy referenced media into the output directory, hardlinking or reflinking where possible.',
+  )
+
+  parser.add_argument(
+    '--dedupe-media',
+    action='store_true',
+    required=False,
+    help='Write media files with identical contents once when syncing media.',
+  )
+
+  parser.add_argument(
+    '--prune',
+    action='store_true',
+    required=False,
+    help='Remove output gamelist.xml files for systems that are no longer in the library.',
+  )
+
+  parser.add_argument(
+    '--fsync',
+    choices=FSYNC_POLICIES,
+    default='batch',
+    required=False,
+    help='When to flush written gamelists to disk: after each file, once for all systems (default), or never.',
+  )
+
+  parser.add_argument(
+    '--targets',
+    '-t',
+    nargs='+',
+    choices=TARGETS,
+    default=['emulationstation'],
+    required=False,
+    help='Frontends to write gamelists for. With more than one, each is written under OUTPUT/<target>.',
+  )
+
+  parser.add_argument(
+    '--watch',
+    action='store_true',
+    required=False,
+    help='Keep running and regenerate systems whenever their gamelist or media changes.',
+  )
+
+  parser.add_argument(
+    '--poll',
+    action='store_true',
+    required=False,
+    help='Poll for changes in watch mode instead of using inotify (for network mounts).',
+  )
+
   args = parser.parse_args()
   PATH = args.path
   OUTPUT = f'{os.path.normpath(args.output)}/'
 
-  main(PATH, OUTPUT)
+  main(
+    PATH,
+    OUTPUT,
+    workers=args.workers,
+    cache=args.cache,
+    hashes=args.hash,
+    hash_cache=args.hash_cache,
+    media=args.sync_media,
+    dedupe=args.dedupe_media,
+    prune=args.prune,
+    fsync=args.fsync,
+    targets=args.targets,
+    watch=args.watch,
+    polling=args.poll,
+  )
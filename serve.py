@@ -0,0 +1,41 @@
+#! /usr/bin/env python3
+"""
+ Program: Serve an ES-DE library over HTTP/JSON for dashboards and other local tools.
+    Name: Andrew Dixon            File: serve.py
+    Date: 17 Oct 2026
+   Notes: python serve.py --path ~/ES-DE --port 8080
+
+    Copyright (C) 2025  Andrew Dixon
+
+    This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+    warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with this program.
+    If not, see <https://www.gnu.org/licenses/>.
+........1.........2.........3.........4.........5.........6.........7.........8.........9.........0.........1.........2.........3..
+"""
+
+import argparse
+from gamelist_tools.utils.Serve import serve
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Serve an ES-DE library over HTTP/JSON.')
+
+  parser.add_argument('--path', '-p', required=True, help='Specify the path to the ES-DE directory.')
+  parser.add_argument('--host', default='127.0.0.1', help='Address to listen on.')
+  parser.add_argument('--port', type=int, default=8080, help='Port to listen on.')
+  parser.add_argument(
+    '--workers', '-w', type=int, default=None, help='Parse systems in this many worker processes.'
+  )
+  parser.add_argument('--cache', '-c', default=None, help='Reuse unchanged systems from this import cache file.')
+
+  args = parser.parse_args()
+
+  try:
+    serve(args.path, args.host, args.port, args.workers, args.cache)
+  except KeyboardInterrupt:
+    print('\n[+] Stopped serving.')